@@ -3,20 +3,25 @@
 # 2025-10-07
 
 import os
-import json
 import sqlite3
+import queue
+import threading
 import logging
+import time
 import datetime as dt
 import asyncio
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Tuple
 
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, EmailStr, ValidationError
-import sendgrid
-from sendgrid.helpers.mail import Mail
+
+from utils import trim
 
 # Configure logging
 logging.basicConfig(
@@ -31,8 +36,10 @@ app = FastAPI(
     title="Caia MailBridge",
     description="SendGrid + Telegram Notification Integration",
     version="1.0.0",
-    openapi_version="3.1.0"
+    openapi_version="3.1.0",
+    default_response_class=ORJSONResponse
 )
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # Environment Variables
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY", "")
@@ -40,6 +47,7 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 DB_PATH = os.getenv("DB_PATH", "mailbridge.sqlite3")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "caia@system.ai")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "5"))
 
 # Validation
 if not SENDGRID_API_KEY:
@@ -48,17 +56,61 @@ if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
     logger.warning("Telegram credentials not configured")
 
 # Global variables for services
-start_time = dt.datetime.utcnow()
+_START_MONO = time.monotonic()
+# Uptime string memo (health probes within the same second reuse it)
+_uptime_sec = -1
+_uptime_str = ""
 
 # ===== Database Setup =====
+# Long-lived connections reused across requests (keeps SQLite's page cache warm).
+# Reads borrow from the pool; writes go through the single writer connection,
+# since SQLite only admits one writer at a time anyway.
+_POOL: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=SQLITE_POOL_SIZE)
+_WRITER: Optional[sqlite3.Connection] = None
+_WRITE_LOCK = threading.Lock()
+
+def dict_factory(cursor, row):
+    """Row factory building plain dicts (skips sqlite3.Row + dict() conversion)"""
+    return {col[0]: row[i] for i, col in enumerate(cursor.description)}
+
 def get_db_connection():
-    """Get SQLite database connection"""
+    """Open a new SQLite database connection"""
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+    conn.row_factory = dict_factory
+    # WAL lets readers run alongside the writer; NORMAL skips the fsync per commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
     return conn
 
+@contextmanager
+def db_conn():
+    """Borrow a pooled SQLite connection for the duration of the block"""
+    conn = _POOL.get()
+    try:
+        yield conn
+    finally:
+        # Never hand a half-finished transaction to the next borrower
+        if conn.in_transaction:
+            conn.rollback()
+        _POOL.put(conn)
+
+@contextmanager
+def db_writer():
+    """Use the shared writer connection for the duration of the block"""
+    with _WRITE_LOCK:
+        try:
+            yield _WRITER
+        finally:
+            if _WRITER.in_transaction:
+                _WRITER.rollback()
+
 def init_database():
     """Initialize database tables"""
+    global _WRITER
     conn = get_db_connection()
     try:
         conn.execute("""
@@ -87,12 +139,21 @@ def init_database():
         )
         """)
         
+        # Indexes for the dashboard counters (range seeks instead of full scans)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_emails_created ON emails(created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_emails_status ON emails(status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_inbox_received ON inbox_emails(received_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_inbox_processed ON inbox_emails(processed)")
+        
         conn.commit()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
-    finally:
-        conn.close()
+    
+    # The init connection stays open as the writer; pre-open the read pool
+    _WRITER = conn
+    for _ in range(SQLITE_POOL_SIZE):
+        _POOL.put(get_db_connection())
 
 # Initialize database on startup
 init_database()
@@ -117,6 +178,39 @@ class EmailSummary(BaseModel):
     processed: bool
 
 # ===== Helper Functions =====
+def utc_now_iso() -> str:
+    """Timezone-aware UTC timestamp (replaces the deprecated utcnow())"""
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+# Shared keep-alive HTTP client for Telegram/SendGrid (opened on startup, closed on shutdown)
+HTTPX: Optional[httpx.AsyncClient] = None
+
+# HTTP/2 multiplexes concurrent sends over one connection when h2 is installed
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+TELEGRAM_SEND_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if startup has not run yet"""
+    global HTTPX
+    if HTTPX is None:
+        HTTPX = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+    return HTTPX
+
+async def _post_telegram(message: str) -> httpx.Response:
+    return await get_http_client().post(
+        TELEGRAM_SEND_URL,
+        json={"chat_id": TELEGRAM_CHAT_ID, "text": message},
+        timeout=10
+    )
+
 async def send_telegram_notification(message: str) -> bool:
     """Send notification to Telegram"""
     if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
@@ -124,73 +218,177 @@ async def send_telegram_notification(message: str) -> bool:
         return False
     
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json={"chat_id": TELEGRAM_CHAT_ID, "text": message},
-                timeout=10
-            )
+        response = await _post_telegram(message)
+        if response.status_code == 200:
+            logger.info("Telegram notification sent successfully")
+            return True
+        else:
+            logger.error(f"Telegram API error: {response.status_code}")
+            return False
+    except Exception as e:
+        logger.error(f"Failed to send Telegram notification: {e}")
+        return False
+
+# ===== Telegram Alert Queue =====
+# Alerts raised on request paths are queued and sent by one background drainer,
+# which coalesces whatever arrived within a flush window into a single message.
+# The queue is bounded (alerts are dropped when full) and sends stay under
+# Telegram's per-bot limit of 30 messages/second.
+ALERT_BATCH_MAX = 10
+ALERT_FLUSH_INTERVAL = 0.5
+ALERT_SEPARATOR = "\n\n"
+TELEGRAM_MAX_CHARS = 4096
+# Room left for the "N건" header in front of a batch
+ALERT_BATCH_CHARS = TELEGRAM_MAX_CHARS - 32
+ALERT_QUEUE_MAX = 1000
+ALERT_MAX_ATTEMPTS = 3
+TELEGRAM_RATE_PER_SEC = 30
+_alert_q: "asyncio.Queue[str]" = asyncio.Queue(maxsize=ALERT_QUEUE_MAX)
+_alert_task: Optional[asyncio.Task] = None
+
+def queue_telegram_notification(message: str) -> None:
+    """Queue a Telegram notification without waiting on the Telegram API"""
+    if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
+        logger.warning("Telegram credentials not configured")
+        return
+    try:
+        _alert_q.put_nowait(message)
+    except asyncio.QueueFull:
+        logger.warning("Telegram alert queue full; dropping notification")
+
+def _telegram_retry_after(response: httpx.Response) -> float:
+    """Seconds to wait from a Telegram 429 response (body parameters or header)"""
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        return float(response.headers.get("Retry-After", 1))
+
+async def _deliver_alert(text: str) -> None:
+    """Send one alert message, backing off when Telegram answers 429"""
+    for _ in range(ALERT_MAX_ATTEMPTS):
+        try:
+            response = await _post_telegram(text)
+        except Exception as e:
+            logger.error(f"Failed to send Telegram notification: {e}")
+            return
+        if response.status_code != 429:
             if response.status_code == 200:
                 logger.info("Telegram notification sent successfully")
-                return True
             else:
                 logger.error(f"Telegram API error: {response.status_code}")
-                return False
-    except Exception as e:
-        logger.error(f"Failed to send Telegram notification: {e}")
-        return False
+            return
+        retry_after = _telegram_retry_after(response)
+        logger.warning(f"Telegram rate limited; retrying in {retry_after}s")
+        await asyncio.sleep(retry_after)
+    logger.error("Telegram notification dropped after repeated rate limiting")
+
+def _format_alert_batch(items: List[str]) -> str:
+    if len(items) == 1:
+        return trim(items[0], TELEGRAM_MAX_CHARS)
+    return trim(f"📬 알림 {len(items)}건{ALERT_SEPARATOR}" + ALERT_SEPARATOR.join(items), TELEGRAM_MAX_CHARS)
+
+async def _alert_drainer():
+    """Send queued alerts, batching whatever arrives within ALERT_FLUSH_INTERVAL of the first.
+
+    A batch is flushed early once it holds ALERT_BATCH_MAX alerts or the next alert
+    would push it past Telegram's 4096-character limit (that alert starts the next batch).
+    """
+    loop = asyncio.get_running_loop()
+    min_interval = 1 / TELEGRAM_RATE_PER_SEC
+    last_sent = 0.0
+    carry: Optional[str] = None
+    while True:
+        if carry is not None:
+            items, carry = [carry], None
+        else:
+            items = [await _alert_q.get()]
+        size = len(items[0])
+        deadline = loop.time() + ALERT_FLUSH_INTERVAL
+        while len(items) < ALERT_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(_alert_q.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(ALERT_SEPARATOR) + len(message) > ALERT_BATCH_CHARS:
+                carry = message
+                break
+            items.append(message)
+            size += len(ALERT_SEPARATOR) + len(message)
+        
+        wait = last_sent + min_interval - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            await _deliver_alert(_format_alert_batch(items))
+        finally:
+            last_sent = loop.time()
+
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+
+def build_sendgrid_payload(email_request: EmailRequest) -> Dict[str, Any]:
+    """Build the SendGrid v3 mail/send JSON body"""
+    personalization: Dict[str, Any] = {
+        "to": [{"email": str(email)} for email in email_request.to]
+    }
+    if email_request.cc:
+        personalization["cc"] = [{"email": str(email)} for email in email_request.cc]
+    if email_request.bcc:
+        personalization["bcc"] = [{"email": str(email)} for email in email_request.bcc]
+    
+    # text/plain must come before text/html
+    content = [{"type": "text/plain", "value": email_request.text}]
+    if email_request.html:
+        content.append({"type": "text/html", "value": email_request.html})
+    
+    return {
+        "personalizations": [personalization],
+        "from": {"email": FROM_EMAIL},
+        "subject": email_request.subject,
+        "content": content
+    }
 
-def send_email_via_sendgrid(email_request: EmailRequest) -> Dict[str, Any]:
+INSERT_EMAIL_SQL = """
+    INSERT INTO emails (sender, recipient, subject, content, sent_via, status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+def log_sent_email(email_request: EmailRequest, recipients: str, status_code: int) -> None:
+    """Record an outgoing email in the database"""
+    with db_writer() as conn:
+        conn.execute(INSERT_EMAIL_SQL, (
+            FROM_EMAIL,
+            recipients,
+            email_request.subject,
+            email_request.text,
+            "sendgrid",
+            "sent" if status_code == 202 else "failed",
+            utc_now_iso()
+        ))
+        conn.commit()
+
+async def send_email_via_sendgrid(email_request: EmailRequest, recipients: str) -> Dict[str, Any]:
     """Send email via SendGrid API"""
     if not SENDGRID_API_KEY:
         raise HTTPException(status_code=500, detail="SendGrid API key not configured")
     
     try:
-        # Create SendGrid message
-        message = Mail(
-            from_email=FROM_EMAIL,
-            to_emails=[str(email) for email in email_request.to],
-            subject=email_request.subject,
-            plain_text_content=email_request.text
+        # Send email without blocking the event loop
+        response = await get_http_client().post(
+            SENDGRID_SEND_URL,
+            content=orjson.dumps(build_sendgrid_payload(email_request)),
+            headers={
+                "Authorization": f"Bearer {SENDGRID_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            timeout=20
         )
+        response.raise_for_status()
         
-        # Add HTML content if provided
-        if email_request.html:
-            message.html_content = email_request.html
-        
-        # Add CC recipients
-        if email_request.cc:
-            for cc_email in email_request.cc:
-                message.add_cc(str(cc_email))
-        
-        # Add BCC recipients
-        if email_request.bcc:
-            for bcc_email in email_request.bcc:
-                message.add_bcc(str(bcc_email))
-        
-        # Send email
-        sg = sendgrid.SendGridAPIClient(api_key=SENDGRID_API_KEY)
-        response = sg.send(message)
-        
-        # Log to database
-        conn = get_db_connection()
-        try:
-            conn.execute("""
-                INSERT INTO emails (sender, recipient, subject, content, sent_via, status, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                FROM_EMAIL,
-                ", ".join([str(email) for email in email_request.to]),
-                email_request.subject,
-                email_request.text,
-                "sendgrid",
-                "sent" if response.status_code == 202 else "failed",
-                dt.datetime.utcnow().isoformat()
-            ))
-            conn.commit()
-        finally:
-            conn.close()
+        # Log to database (off the event loop)
+        await asyncio.to_thread(log_sent_email, email_request, recipients, response.status_code)
         
         logger.info(f"Email sent via SendGrid: {response.status_code}")
         return {
@@ -204,61 +402,86 @@ def send_email_via_sendgrid(email_request: EmailRequest) -> Dict[str, Any]:
         logger.error(f"SendGrid error: {e}")
         raise HTTPException(status_code=502, detail=f"SendGrid send failed: {e}")
 
-async def simulate_inbox_check() -> List[Dict[str, Any]]:
-    """Simulate checking inbox for new emails"""
-    # This would normally connect to an email provider (IMAP/POP3)
-    # For now, we'll return mock data and check the database
-    
-    conn = get_db_connection()
-    try:
+def _load_inbox() -> Tuple[List[Dict[str, Any]], bool, str]:
+    """Blocking part of the inbox check; returns (emails, sample_created, etag)"""
+    with db_conn() as conn:
+        # Listing and ETag from one read snapshot so the tag always describes the body
+        conn.execute("BEGIN")
+        etag = _inbox_etag(conn)
         # Get recent inbox emails
         cursor = conn.execute("""
             SELECT * FROM inbox_emails 
             ORDER BY id DESC 
             LIMIT 20
         """)
-        emails = [dict(row) for row in cursor.fetchall()]
-        
-        # If no emails exist, create a sample one for demonstration
-        if not emails:
-            sample_email = {
-                "sender": "test@example.com",
-                "subject": "Test Email",
-                "content": "This is a test email for demonstration",
-                "received_at": dt.datetime.utcnow().isoformat()
-            }
-            conn.execute("""
-                INSERT INTO inbox_emails (sender, subject, content, received_at)
-                VALUES (?, ?, ?, ?)
-            """, (sample_email["sender"], sample_email["subject"], 
-                   sample_email["content"], sample_email["received_at"]))
-            conn.commit()
-            
-            # Send Telegram notification for new email
-            await send_telegram_notification(
-                f"📩 새 메일 도착\nFrom: {sample_email['sender']}\nSubject: {sample_email['subject']}"
-            )
-            
-            # Update notification flag
-            conn.execute("""
-                UPDATE inbox_emails SET telegram_notified = 1 
-                WHERE sender = ? AND subject = ?
-            """, (sample_email["sender"], sample_email["subject"]))
-            conn.commit()
-            
-            emails = [sample_email]
-        
-        return emails
-        
-    finally:
-        conn.close()
+        emails = cursor.fetchall()
+    
+    if emails:
+        return emails, False, etag
+    
+    # If no emails exist, create a sample one for demonstration
+    sample_email = {
+        "sender": "test@example.com",
+        "subject": "Test Email",
+        "content": "This is a test email for demonstration",
+        "received_at": utc_now_iso()
+    }
+    # Insert + notification flag in one transaction (one commit).
+    # The alert is only queued, so the row is flagged together with the insert.
+    with db_writer() as conn, conn:
+        cursor = conn.execute("""
+            INSERT INTO inbox_emails (sender, subject, content, received_at)
+            VALUES (?, ?, ?, ?)
+        """, (sample_email["sender"], sample_email["subject"], 
+               sample_email["content"], sample_email["received_at"]))
+        # Update notification flag (by rowid; sender/subject would scan the table)
+        conn.execute("""
+            UPDATE inbox_emails SET telegram_notified = 1 
+            WHERE id = ?
+        """, (cursor.lastrowid,))
+        # Tag the response with the state that includes the sample row
+        etag = _inbox_etag(conn)
+    
+    return [sample_email], True, etag
+
+async def simulate_inbox_check() -> Tuple[List[Dict[str, Any]], str]:
+    """Simulate checking inbox for new emails"""
+    # This would normally connect to an email provider (IMAP/POP3)
+    # For now, we'll return mock data and check the database
+    # (SQLite work runs in a worker thread so the event loop is never blocked)
+    emails, sample_created, etag = await asyncio.to_thread(_load_inbox)
+    
+    if sample_created:
+        # Send Telegram notification for new email
+        sample_email = emails[0]
+        queue_telegram_notification(
+            f"📩 새 메일 도착\nFrom: {sample_email['sender']}\nSubject: {sample_email['subject']}"
+        )
+    
+    return emails, etag
+
+def _inbox_etag(conn: sqlite3.Connection) -> str:
+    """Weak ETag for the inbox listing; changes whenever a row is added or removed"""
+    row = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) AS max_id, COUNT(*) AS cnt FROM inbox_emails"
+    ).fetchone()
+    return f'W/"inbox-{row["max_id"]}-{row["cnt"]}"'
+
+def get_inbox_etag() -> str:
+    """Current inbox ETag on a pooled connection (cheap If-None-Match pre-check)"""
+    with db_conn() as conn:
+        return _inbox_etag(conn)
 
 def get_uptime() -> str:
     """Calculate service uptime"""
-    uptime_delta = dt.datetime.utcnow() - start_time
-    hours, remainder = divmod(int(uptime_delta.total_seconds()), 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours:02d}h {minutes:02d}m {seconds:02d}s"
+    global _uptime_sec, _uptime_str
+    sec = int(time.monotonic() - _START_MONO)
+    if sec != _uptime_sec:
+        hours, remainder = divmod(sec, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        _uptime_str = f"{hours:02d}h {minutes:02d}m {seconds:02d}s"
+        _uptime_sec = sec
+    return _uptime_str
 
 # ===== Error Handlers =====
 @app.exception_handler(RequestValidationError)
@@ -298,15 +521,17 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 # ===== API Routes =====
+# Static body for the liveness probe, serialized once at import
+_ROOT_BYTES = orjson.dumps({"status": "ok", "service": "MailBridge"})
+
 @app.get("/")
 async def root():
     """Root endpoint - service alive check"""
-    return {"status": "ok", "service": "MailBridge"}
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 @app.get("/favicon.ico")
 async def favicon():
     """Favicon endpoint"""
-    from fastapi.responses import Response
     return Response(status_code=204)
 
 @app.post("/send")
@@ -314,124 +539,143 @@ async def send_email_endpoint(email_request: EmailRequest):
     """Send email via SendGrid"""
     logger.info(f"Sending email to: {email_request.to}, subject: {email_request.subject}")
     
-    result = send_email_via_sendgrid(email_request)
+    # Serialized once; shared by the DB row and the Telegram notification
+    recipients = ", ".join(map(str, email_request.to))
+    result = await send_email_via_sendgrid(email_request, recipients)
     
     # Send Telegram notification for outgoing emails
-    await send_telegram_notification(
-        f"📤 메일 발송\nTo: {', '.join([str(email) for email in email_request.to])}\nSubject: {email_request.subject}"
+    queue_telegram_notification(
+        f"📤 메일 발송\nTo: {recipients}\nSubject: {email_request.subject}"
     )
     
     return result
 
 @app.get("/inbox")
-async def check_inbox():
+async def check_inbox(request: Request):
     """Check inbox for new emails"""
     logger.info("Checking inbox for new emails")
     
-    emails = await simulate_inbox_check()
+    # Polling clients get 304 when nothing was added since their last fetch
+    etag = await asyncio.to_thread(get_inbox_etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     
-    return {
+    # The check may insert a row, so the response carries the tag computed with the listing
+    emails, etag = await simulate_inbox_check()
+    
+    return ORJSONResponse({
         "ok": True,
         "count": len(emails),
         "emails": emails
-    }
+    }, headers={"ETag": etag})
+
+# One round-trip for the whole dashboard: counters as scalar subqueries,
+# recent activity folded into JSON arrays (SQLite JSON1)
+DASHBOARD_SQL = """
+    SELECT (SELECT COUNT(*) FROM emails) AS total_sent,
+           (SELECT COUNT(*) FROM emails WHERE created_at >= :today) AS sent_today,
+           (SELECT COUNT(*) FROM emails WHERE status = 'sent') AS sent_success,
+           (SELECT COUNT(*) FROM inbox_emails) AS total_received,
+           (SELECT COUNT(*) FROM inbox_emails WHERE received_at >= :today) AS received_today,
+           (SELECT COUNT(*) FROM inbox_emails WHERE processed = 1) AS processed,
+           (SELECT json_group_array(json_object(
+                       'recipient', recipient, 'subject', subject, 'created_at', created_at))
+            FROM (SELECT recipient, subject, created_at
+                  FROM emails ORDER BY id DESC LIMIT 5)) AS recent_sent,
+           (SELECT json_group_array(json_object(
+                       'sender', sender, 'subject', subject, 'received_at', received_at))
+            FROM (SELECT sender, subject, received_at
+                  FROM inbox_emails ORDER BY id DESC LIMIT 5)) AS recent_received
+"""
+
+def _fetch_dashboard_row(today_iso: str) -> Dict[str, Any]:
+    with db_conn() as conn:
+        return conn.execute(DASHBOARD_SQL, {"today": today_iso}).fetchone()
 
 @app.get("/dashboard/summary")
 async def get_dashboard_summary():
     """Get dashboard summary with email statistics"""
     logger.info("Getting dashboard summary")
     
-    conn = get_db_connection()
-    try:
-        # Get sent email stats
-        sent_cursor = conn.execute("""
-            SELECT COUNT(*) as total_sent,
-                   COUNT(CASE WHEN date(created_at) = date('now') THEN 1 END) as sent_today,
-                   COUNT(CASE WHEN status = 'sent' THEN 1 END) as sent_success
-            FROM emails
-        """)
-        sent_stats = dict(sent_cursor.fetchone())
-        
-        # Get received email stats
-        received_cursor = conn.execute("""
-            SELECT COUNT(*) as total_received,
-                   COUNT(CASE WHEN date(received_at) = date('now') THEN 1 END) as received_today,
-                   COUNT(CASE WHEN processed = 1 THEN 1 END) as processed
-            FROM inbox_emails
-        """)
-        received_stats = dict(received_cursor.fetchone())
-        
-        # Get recent activities
-        recent_sent_cursor = conn.execute("""
-            SELECT recipient, subject, created_at 
-            FROM emails 
-            ORDER BY id DESC 
-            LIMIT 5
-        """)
-        recent_sent = [dict(row) for row in recent_sent_cursor.fetchall()]
-        
-        recent_received_cursor = conn.execute("""
-            SELECT sender, subject, received_at 
-            FROM inbox_emails 
-            ORDER BY id DESC 
-            LIMIT 5
-        """)
-        recent_received = [dict(row) for row in recent_received_cursor.fetchall()]
-        
-        return {
-            "ok": True,
-            "stats": {
-                "sent": sent_stats,
-                "received": received_stats
-            },
-            "recent_activities": {
-                "sent": recent_sent,
-                "received": recent_received
-            },
-            "uptime": get_uptime(),
-            "services": {
-                "sendgrid": bool(SENDGRID_API_KEY),
-                "telegram": bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)
-            }
+    # Timestamps are stored as UTC ISO strings, so ">= today" is an index range seek
+    today_iso = dt.datetime.now(dt.timezone.utc).date().isoformat()
+    
+    row = await asyncio.to_thread(_fetch_dashboard_row, today_iso)
+    sent_stats = {
+        "total_sent": row["total_sent"],
+        "sent_today": row["sent_today"],
+        "sent_success": row["sent_success"]
+    }
+    received_stats = {
+        "total_received": row["total_received"],
+        "received_today": row["received_today"],
+        "processed": row["processed"]
+    }
+    recent_sent = orjson.loads(row["recent_sent"])
+    recent_received = orjson.loads(row["recent_received"])
+    
+    return {
+        "ok": True,
+        "stats": {
+            "sent": sent_stats,
+            "received": received_stats
+        },
+        "recent_activities": {
+            "sent": recent_sent,
+            "received": recent_received
+        },
+        "uptime": get_uptime(),
+        "services": {
+            "sendgrid": bool(SENDGRID_API_KEY),
+            "telegram": bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)
         }
-        
-    finally:
-        conn.close()
+    }
+
+# Sent and received lookups in one statement; sent wins when both tables hold the id.
+# UNION ALL takes column names from the first SELECT, so the second one is positional.
+EMAIL_DETAIL_SQL = """
+    SELECT 'sent' AS type, sender, recipient AS other_party, subject, content,
+           created_at AS timestamp, status
+    FROM emails WHERE id = :id
+    UNION ALL
+    SELECT 'received', 'system', sender, subject, content, received_at,
+           CASE WHEN processed = 1 THEN 'processed' ELSE 'unprocessed' END
+    FROM inbox_emails WHERE id = :id
+    LIMIT 1
+"""
+
+def _fetch_email_detail(email_id: int) -> Optional[Dict[str, Any]]:
+    with db_conn() as conn:
+        return conn.execute(EMAIL_DETAIL_SQL, {"id": email_id}).fetchone()
 
 @app.get("/view/{email_id}")
-async def view_email_detail(email_id: int):
+async def view_email_detail(email_id: int, request: Request):
     """View detailed email information"""
     logger.info(f"Viewing email detail for ID: {email_id}")
     
-    conn = get_db_connection()
-    try:
-        # Try to find in sent emails first
-        cursor = conn.execute("""
-            SELECT 'sent' as type, sender, recipient as other_party, subject, content, created_at as timestamp, status
-            FROM emails WHERE id = ?
-        """, (email_id,))
-        result = cursor.fetchone()
-        
-        # If not found in sent, check received emails
-        if not result:
-            cursor = conn.execute("""
-                SELECT 'received' as type, sender as other_party, 'system' as sender, subject, content, received_at as timestamp, 
-                       CASE WHEN processed = 1 THEN 'processed' ELSE 'unprocessed' END as status
-                FROM inbox_emails WHERE id = ?
-            """, (email_id,))
-            result = cursor.fetchone()
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="Email not found")
-        
-        email_detail = dict(result)
-        return {
-            "ok": True,
-            "email": email_detail
-        }
-        
-    finally:
-        conn.close()
+    email_detail = await asyncio.to_thread(_fetch_email_detail, email_id)
+    if not email_detail:
+        raise HTTPException(status_code=404, detail="Email not found")
+    
+    # Stored emails are never edited; only the received status can change
+    etag = f'W/"{email_detail["type"]}-{email_id}-{email_detail["status"]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse({
+        "ok": True,
+        "email": email_detail
+    }, headers={"ETag": etag})
+
+@app.get("/pool-health")
+async def pool_health():
+    """SQLite connection pool usage"""
+    idle = _POOL.qsize()
+    return {
+        "ok": True,
+        "size": SQLITE_POOL_SIZE,
+        "idle": idle,
+        "active": SQLITE_POOL_SIZE - idle
+    }
 
 @app.post("/test/assistant")
 async def test_assistant_processing(request: AssistantTestRequest):
@@ -445,14 +689,14 @@ async def test_assistant_processing(request: AssistantTestRequest):
         "ok": True,
         "message": processed_text,
         "original": request.text,
-        "timestamp": dt.datetime.utcnow().isoformat()
+        "timestamp": utc_now_iso()
     }
 
 @app.post("/webhook/telegram")
 async def telegram_webhook(request: Request):
     """Internal webhook for processing new email notifications"""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         sender = data.get("sender", "unknown")
         subject = data.get("subject", "No Subject")
         
@@ -479,7 +723,7 @@ async def health_check():
         "sendgrid": bool(SENDGRID_API_KEY),
         "telegram": bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID),
         "version": APP_VERSION,
-        "timestamp": dt.datetime.utcnow().isoformat()
+        "timestamp": utc_now_iso()
     }
 
 # ===== Startup Event =====
@@ -490,12 +734,27 @@ async def startup_event():
     logger.info(f"📧 SendGrid configured: {bool(SENDGRID_API_KEY)}")
     logger.info(f"📱 Telegram configured: {bool(TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID)}")
     
-    # Send startup notification
+    # Open the shared HTTP client and start the Telegram alert drainer
+    get_http_client()
+    global _alert_task
+    _alert_task = asyncio.create_task(_alert_drainer())
+    
+    # Send startup notification (queued; startup never waits on Telegram)
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        await send_telegram_notification(
-            f"🚀 MailBridge 서비스 시작\nVersion: {APP_VERSION}\nTimestamp: {dt.datetime.utcnow().isoformat()}"
+        queue_telegram_notification(
+            f"🚀 MailBridge 서비스 시작\nVersion: {APP_VERSION}\nTimestamp: {utc_now_iso()}"
         )
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown"""
+    global HTTPX
+    if _alert_task:
+        _alert_task.cancel()
+    if HTTPX is not None:
+        await HTTPX.aclose()
+        HTTPX = None
+
 # ===== Main Application Entry Point =====
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,10 @@
-import os, time, json, ssl, smtplib, email
+import os, time, json, ssl, smtplib, queue, binascii, quopri, atexit, threading, functools
+from collections import OrderedDict
+from email import policy
+from email.header import decode_header, make_header
 from email.message import EmailMessage
+from email.parser import BytesParser
+from email.utils import parseaddr
 from imapclient import IMAPClient
 from dotenv import load_dotenv
 
@@ -16,21 +21,152 @@ SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL_SEC", "120"))
+# IDLE 재발행 주기 (서버는 보통 30분 무응답 IDLE을 끊음)
+IDLE_TIMEOUT = int(os.getenv("IDLE_TIMEOUT_SEC", str(29 * 60)))
 SUBJECT_PREFIX = os.getenv("SUBJECT_PREFIX", "[CAIA-JOB]")
 REPLY_FROM = os.getenv("REPLY_FROM") or SMTP_USER
+# SMTP 봉투(MAIL FROM)용 순수 주소
+REPLY_FROM_ADDR = parseaddr(REPLY_FROM or "")[1] or REPLY_FROM
 ZENSPARK_INBOX = os.getenv("ZENSPARK_INBOX", "jobs@caia-agent.com")
+SMTP_CONCURRENCY = int(os.getenv("SMTP_CONCURRENCY", "4"))
+SEND_RETRIES = 3
+SEND_BACKOFF = 1.0
+TRANSIENT_SMTP_CODES = (421, 450, 451, 452)
+
+# 로그인된 SMTP 연결 재사용 (메일마다 TCP/TLS/AUTH 반복 방지), 발송 워커 수만큼만 보관
+_SMTP_POOL: "queue.Queue[smtplib.SMTP_SSL]" = queue.Queue(maxsize=SMTP_CONCURRENCY)
+
+# 발송 큐: 잡 처리는 enqueue만 하고, SMTP 왕복은 SMTP_CONCURRENCY개의 발송 워커가 처리
+_OUTQ: "queue.Queue[tuple]" = queue.Queue(maxsize=1024)  # (수신 주소, 직렬화된 메시지)
+
+def _smtp_open():
+    context = ssl.create_default_context()
+    s = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context)
+    s.login(SMTP_USER, SMTP_PASSWORD)
+    return s
+
+def _smtp_close(s):
+    try:
+        s.quit()
+    except Exception:
+        s.close()
+
+def _smtp_acquire():
+    # 유휴 연결 중 NOOP에 250으로 답하는 것을 재사용, 없으면 새로 연결
+    while True:
+        try:
+            s = _SMTP_POOL.get_nowait()
+        except queue.Empty:
+            return _smtp_open()
+        try:
+            if s.noop()[0] == 250:
+                return s
+        except (smtplib.SMTPException, OSError):
+            pass
+        _smtp_close(s)
+
+def _smtp_release(s):
+    try:
+        _SMTP_POOL.put_nowait(s)
+    except queue.Full:
+        _smtp_close(s)
+
+@atexit.register
+def _smtp_close_all():
+    while True:
+        try:
+            _smtp_close(_SMTP_POOL.get_nowait())
+        except queue.Empty:
+            return
+
+# 발신자/수신 주소는 같은 값이 반복되므로 parseaddr 결과 캐시
+_parseaddr = functools.lru_cache(maxsize=1024)(parseaddr)
+
+def _send_message(to_addr: str, data: bytes):
+    rcpt = _parseaddr(to_addr)[1] or to_addr
+    for attempt in (1, 2):
+        s = _smtp_acquire()
+        try:
+            s.sendmail(REPLY_FROM_ADDR, [rcpt], data)
+        except smtplib.SMTPServerDisconnected:
+            # NOOP 직후 끊긴 연결 등: 새 연결로 한 번만 재시도
+            _smtp_close(s)
+            if attempt == 2:
+                raise
+            continue
+        except Exception:
+            # 상태를 알 수 없는 연결은 풀에 돌려놓지 않음
+            _smtp_close(s)
+            raise
+        _smtp_release(s)
+        return
+
+def _send_with_backoff(to_addr: str, data: bytes):
+    # 421/45x(일시적 거부)는 지수 백오프로 재시도
+    for attempt in range(SEND_RETRIES + 1):
+        try:
+            _send_message(to_addr, data)
+            return
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code not in TRANSIENT_SMTP_CODES or attempt == SEND_RETRIES:
+                raise
+            time.sleep(SEND_BACKOFF * (2 ** attempt))
+
+def _outbound_worker():
+    while True:
+        to_addr, data = _OUTQ.get()
+        try:
+            _send_with_backoff(to_addr, data)
+        except Exception as e:
+            print(f"Send to {to_addr} failed:", e)
+        finally:
+            _OUTQ.task_done()
+
+_outbound_lock = threading.Lock()
+_outbound_started = False
+# 종료 시 남은 발송을 기다리는 최대 시간
+FLUSH_TIMEOUT = 30
+
+def start_outbound_workers():
+    """발송 워커를 한 번만 시작 (첫 send_mail에서도 자동 호출, 중복 호출은 무시)"""
+    global _outbound_started
+    with _outbound_lock:
+        if _outbound_started:
+            return
+        for i in range(SMTP_CONCURRENCY):
+            threading.Thread(target=_outbound_worker, name=f"smtp-{i}", daemon=True).start()
+        _outbound_started = True
+
+@atexit.register
+def _flush_outbound():
+    # 종료 전에 대기 중인 발송을 마저 처리 (atexit은 역순 실행 → SMTP 연결 정리보다 먼저)
+    # 워커가 없으면 기다리지 않고, 있어도 FLUSH_TIMEOUT까지만 대기
+    if not _outbound_started:
+        return
+    deadline = time.monotonic() + FLUSH_TIMEOUT
+    with _OUTQ.all_tasks_done:
+        while _OUTQ.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"Outbound flush timed out, {_OUTQ.unfinished_tasks} mail(s) not sent")
+                return
+            _OUTQ.all_tasks_done.wait(remaining)
 
 def send_mail(to_addr: str, subject: str, body_text: str):
-    msg = EmailMessage()
+    """메시지를 만들어 발송 큐에 넣고 바로 반환 (실제 SMTP는 발송 워커가 처리)"""
+    msg = EmailMessage(policy=policy.SMTP)
     msg["From"] = REPLY_FROM
     msg["To"] = to_addr
     msg["Subject"] = subject
     msg.set_content(body_text)
+    # CRLF 형태로 한 번만 직렬화 — 재시도/재연결 때 다시 만들지 않음
+    data = msg.as_bytes()
+    if not _outbound_started:
+        # main_loop 밖(import 후 직접 호출 등)에서도 큐가 소비되도록
+        start_outbound_workers()
+    _OUTQ.put((to_addr, data))
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=context) as s:
-        s.login(SMTP_USER, SMTP_PASSWORD)
-        s.send_message(msg)
+_JSON_DEC = json.JSONDecoder()
 
 def parse_job_json_from_body(body: str):
     """
@@ -38,63 +174,233 @@ def parse_job_json_from_body(body: str):
     """
     body = body.strip()
     # 가장 단순한 케이스: 본문 전체가 JSON
-    try:
-        data = json.loads(body)
-        return data
-    except Exception:
-        pass
-    # fallback: 중괄호 시작/끝을 찾아서 추출
+    if body[:1] in ("{", "["):
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+    # fallback: 첫 중괄호부터 JSON 값 하나만 디코딩 (뒤에 붙은 인용/서명은 무시)
     start = body.find("{")
-    end = body.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        snippet = body[start:end+1]
+    if start == -1:
+        return None
+    try:
+        return _JSON_DEC.raw_decode(body, start)[0]
+    except ValueError:
+        return None
+
+_PARSER = BytesParser(policy=policy.default)
+
+def parse_rfc822(raw: bytes):
+    """
+    RFC822 원문 → (subject, from_addr, body_text)
+    policy.default 파서가 헤더 디코딩/CTE/charset 처리, 본문은 get_body로 바로 선택
+    """
+    msg = _PARSER.parsebytes(raw)
+    subject = str(msg.get('Subject', ''))
+    from_addr = parseaddr(str(msg.get('From', '')))[1]
+    # 본문 텍스트 추출 (첨부가 아닌 text/plain)
+    body_text = ""
+    part = msg.get_body(preferencelist=('plain',))
+    if part is None and not msg.is_multipart():
+        # 단일 파트는 타입과 무관하게 본문으로 사용 (기존 동작 유지)
+        part = msg
+    if part is not None:
+        try:
+            body_text = part.get_content()
+        except (LookupError, UnicodeError):
+            # 알 수 없는 charset 등은 기존처럼 무시하고 디코딩
+            payload = part.get_payload(decode=True) or b""
+            body_text = payload.decode("utf-8", errors="ignore")
+    return subject, from_addr, body_text
+
+# 잡 처리에 필요한 헤더만 요청 (BODY.PEEK라 \Seen 변경 없음)
+HEADER_ITEM = 'BODY.PEEK[HEADER.FIELDS (SUBJECT FROM)]'
+
+def _find_text_plain(bs, part: str = ""):
+    """
+    BODYSTRUCTURE에서 첫 text/plain 리프 → (파트번호, CTE, charset), 없으면 None
+    """
+    if bs.is_multipart:
+        for i, sub in enumerate(bs[0], 1):
+            found = _find_text_plain(sub, f"{part}.{i}" if part else str(i))
+            if found:
+                return found
+        return None
+    if (bs[0] or b"").lower() != b"text" or (bs[1] or b"").lower() != b"plain":
+        return None
+    # 첨부(.txt 등)는 본문이 아님 — text 파트 확장 데이터: [8]=MD5, [9]=(disposition, params)
+    disposition = bs[9] if len(bs) > 9 else None
+    if disposition and isinstance(disposition, tuple) and (disposition[0] or b"").lower() == b"attachment":
+        return None
+    params = bs[2] or ()
+    charset = "utf-8"
+    for k, v in zip(params[::2], params[1::2]):
+        if k.lower() == b"charset" and v:
+            charset = v.decode("ascii", errors="ignore")
+    return part or "1", (bs[5] or b"").lower(), charset
+
+def _decode_part(payload: bytes, cte: bytes, charset: str) -> str:
+    if cte == b"base64":
+        payload = binascii.a2b_base64(payload)
+    elif cte == b"quoted-printable":
+        payload = quopri.decodestring(payload)
+    try:
+        return payload.decode(charset, errors="ignore")
+    except LookupError:
+        return payload.decode("utf-8", errors="ignore")
+
+# 헤더 두 줄만 보면 되므로 policy.default의 헤더 객체 생성 없이 compat32로 파싱
+_HEADER_PARSER = BytesParser()
+
+@functools.lru_cache(maxsize=4096)
+def _decode_subject(raw: str) -> str:
+    """RFC 2047 제목 디코딩 (같은 제목이 반복되는 경우가 많아 캐시)"""
+    raw = raw.replace("\r\n", "").replace("\n", "")
+    if "=?" not in raw and raw.isascii():
+        return raw
+    try:
+        return str(make_header(decode_header(raw)))
+    except (LookupError, UnicodeError, ValueError):
+        return raw
+
+def _parse_header_fields(raw: bytes):
+    hdr = _HEADER_PARSER.parsebytes(raw, headersonly=True)
+    return _decode_subject(str(hdr.get('Subject', ''))), _parseaddr(str(hdr.get('From', '')))[1]
+
+# 로그인+INBOX 선택된 IMAP 연결을 폴링 사이에 유지 (매 틱 TCP/TLS/LOGIN 반복 방지)
+_IMAP = None
+
+def _imap_connect():
+    context = ssl.create_default_context()
+    server = IMAPClient(IMAP_HOST, port=IMAP_PORT, ssl=True, ssl_context=context)
+    server.login(IMAP_USER, IMAP_PASSWORD)
+    server.select_folder("INBOX")
+    return server
+
+def _imap_drop():
+    global _IMAP
+    if _IMAP is not None:
         try:
-            return json.loads(snippet)
+            _IMAP.logout()
         except Exception:
-            return None
-    return None
+            pass
+    _IMAP = None
+
+def get_imap():
+    """유지 중인 연결이 NOOP에 응답하면 재사용, 아니면 새로 로그인"""
+    global _IMAP
+    if _IMAP is not None:
+        try:
+            _IMAP.noop()
+            return _IMAP
+        except Exception:
+            _imap_drop()
+    _IMAP = _imap_connect()
+    return _IMAP
+
+def wait_for_mail():
+    """
+    IDLE로 새 메일(EXISTS) push가 올 때까지 대기. RFC 2177 서버 타임아웃 전에
+    IDLE_TIMEOUT마다 깨어나 재검색(안전망). IDLE 미지원/연결 오류 시에는 POLL_INTERVAL sleep.
+    """
+    try:
+        server = get_imap()
+        if not server.has_capability('IDLE'):
+            time.sleep(POLL_INTERVAL)
+            return
+        # 직전 SEARCH/STORE/NOOP 응답에 섞여 온 EXISTS는 IDLE 중에 다시 오지 않음
+        # → IDLE 진입 전에 미처리 잡 메일이 있는지 한 번 더 확인 (있으면 바로 처리)
+        if server.search(['UNSEEN', 'SUBJECT', SUBJECT_PREFIX]):
+            return
+        deadline = time.monotonic() + IDLE_TIMEOUT
+        server.idle()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                responses = server.idle_check(timeout=remaining)
+                # 플래그 변경/EXPUNGE 등은 무시하고 계속 대기
+                if any(len(r) > 1 and r[1] == b'EXISTS' for r in responses):
+                    return
+        finally:
+            server.idle_done()
+    except Exception as e:
+        print("IDLE error:", e)
+        _imap_drop()
+        time.sleep(POLL_INTERVAL)
 
 def fetch_unseen_jobs():
-    context = ssl.create_default_context()
-    with IMAPClient(IMAP_HOST, port=IMAP_PORT, ssl=True, ssl_context=context) as server:
-        server.login(IMAP_USER, IMAP_PASSWORD)
-        server.select_folder("INBOX")
-        # 제목 패턴: [CAIA-JOB]
-        messages = server.search(['UNSEEN', 'SUBJECT', SUBJECT_PREFIX])
-        if not messages:
-            return []
-
-        fetched = server.fetch(messages, ['ENVELOPE', 'RFC822', 'UID'])
-        jobs = []
+    server = get_imap()
+    try:
+        return _fetch_unseen_jobs(server)
+    except Exception:
+        # 상태를 알 수 없는 연결은 버리고 다음 틱에 재연결
+        _imap_drop()
+        raise
+
+def _fetch_unseen_jobs(server):
+    # 제목 패턴: [CAIA-JOB]
+    messages = server.search(['UNSEEN', 'SUBJECT', SUBJECT_PREFIX])
+    if not messages:
+        return []
+
+    # 1) 구조 + 헤더만 먼저 받아 제목 확인, 본문(text/plain) 파트 위치 확인 — 첨부 바이트는 전송받지 않음
+    first = server.fetch(messages, ['BODYSTRUCTURE', HEADER_ITEM])
+    headers = {}   # uid → (subject, from)
+    by_part = {}   # 파트번호 → [(uid, CTE, charset)]
+    whole = []     # 단일 파트(비 text/plain) 메일만 원문 전체로 처리
+    for uid, data in first.items():
+        # 서버마다 필드명 표기가 달라 접두어로 찾음
+        header = next((v for k, v in data.items() if k.startswith(b'BODY[HEADER')), b"")
+        subject, from_addr = _parse_header_fields(header or b"")
+        if SUBJECT_PREFIX not in subject:
+            # SEARCH는 부분일치라 통과했지만 접두어가 없는 메일 — 본문 받지 않음
+            continue
+        headers[uid] = (subject, from_addr)
+        bs = data[b'BODYSTRUCTURE']
+        found = _find_text_plain(bs)
+        if found:
+            by_part.setdefault(found[0], []).append((uid, found[1], found[2]))
+        elif not bs.is_multipart:
+            # 단일 파트는 타입과 무관하게 본문으로 사용 (parse_rfc822와 같은 규칙)
+            whole.append(uid)
+        # text/plain 없는 멀티파트는 본문이 없으므로 받지 않음 (아래에서 \Seen만 표시)
+
+    # 2) 통과한 메일만 본문 파트 선택 FETCH (파트번호가 같은 메일끼리 한 번에)
+    parsed = {}
+    for part, items in by_part.items():
+        body_key = f'BODY[{part}]'.encode()
+        fetched = server.fetch([uid for uid, _, _ in items], [f'BODY.PEEK[{part}]'])
+        for uid, cte, charset in items:
+            data = fetched.get(uid)
+            if not data:
+                continue
+            parsed[uid] = headers[uid] + (_decode_part(data.get(body_key) or b"", cte, charset),)
+    if whole:
+        fetched = server.fetch(whole, ['BODY.PEEK[]'])
         for uid, data in fetched.items():
-            raw = data[b'RFC822']
-            msg = email.message_from_bytes(raw)
-            subject = str(email.header.make_header(email.header.decode_header(msg.get('Subject', ''))))
-            from_addr = email.utils.parseaddr(msg.get('From'))[1]
-            # 본문 텍스트 추출
-            body_text = ""
-            if msg.is_multipart():
-                for part in msg.walk():
-                    ctype = part.get_content_type()
-                    disp = part.get("Content-Disposition", "")
-                    if ctype == "text/plain" and "attachment" not in disp:
-                        body_text = part.get_payload(decode=True).decode(part.get_content_charset() or "utf-8", errors="ignore")
-                        break
-            else:
-                body_text = msg.get_payload(decode=True).decode(msg.get_content_charset() or "utf-8", errors="ignore")
-
-            job = {
-                "uid": uid,
-                "subject": subject,
-                "from": from_addr,
-                "body": body_text,
-                "json": parse_job_json_from_body(body_text)
-            }
-            jobs.append(job)
-
-            # 스레드 충돌 방지 위해 바로 읽음표시(옵션)
-            server.add_flags(uid, [b'\\Seen'])
-        return jobs
+            parsed[uid] = parse_rfc822(data[b'BODY[]'])
+
+    jobs = []
+    for uid in messages:
+        if uid not in parsed:
+            continue
+        subject, from_addr, body_text = parsed[uid]
+
+        job = {
+            "uid": uid,
+            "subject": subject,
+            "from": from_addr,
+            "body": body_text,
+            "json": parse_job_json_from_body(body_text)
+        }
+        jobs.append(job)
+
+    # 스레드 충돌 방지 위해 읽음표시 — 메일마다 STORE 대신 한 번에
+    # 검색된 메일 전부 포함 (제외/본문 없음 메일이 IDLE 전 재검색에 계속 걸리지 않도록)
+    server.add_flags(messages, [b'\\Seen'])
+    return jobs
 
 def forward_to_zenspark(original_from: str, subject: str, body_json: dict):
     """
@@ -120,37 +426,62 @@ def ack_to_sender(sender: str, job_id: str, ok: bool, msg: str):
 
 def extract_job_id(subject: str) -> str:
     # 예: [CAIA-JOB] video_transcribe #auto-20250809-001
-    if "#" in subject:
-        return subject.split("#")[-1].strip()
-    return "unknown"
+    # 마지막 '#' 뒤 (split 리스트 생성 없이)
+    head, sep, tail = subject.rpartition("#")
+    return tail.strip() if sep else "unknown"
+
+# 처리한 UID (재연결 등으로 \Seen 표시 전에 같은 메일이 다시 잡히면 포워딩/ACK 중복 발송 방지)
+_SEEN_MAX = 4096
+_seen_uids: "OrderedDict[int, None]" = OrderedDict()
+_seen_lock = threading.Lock()
+
+def _mark_seen(uid) -> bool:
+    """이미 처리한 UID면 True, 처음이면 기록하고 False"""
+    with _seen_lock:
+        if uid in _seen_uids:
+            return True
+        _seen_uids[uid] = None
+        if len(_seen_uids) > _SEEN_MAX:
+            _seen_uids.popitem(last=False)
+        return False
+
+def process_job(job: dict):
+    subj = job["subject"]
+    sender = job["from"]
+    # SUBJECT_PREFIX 확인은 fetch 단계에서 이미 끝남 (통과한 메일만 잡으로 옴)
+    job_id = extract_job_id(subj)
+
+    if _mark_seen(job["uid"]):
+        return
+
+    try:
+        if not job["json"]:
+            ack_to_sender(sender, job_id, False, "본문에서 유효한 Job JSON을 찾지 못했습니다.")
+            return
+
+        # 젠스파크로 전달
+        forward_to_zenspark(sender, subj, job["json"])
+        # 접수 확인 회신
+        ack_to_sender(sender, job_id, True, "작업을 접수하여 젠스파크로 전달했습니다.")
+        print(f"Forwarded job {job_id} from {sender}")
+    except Exception as e:
+        # 한 잡의 실패가 같은 배치의 다른 잡 처리를 막지 않도록 잡 단위로 처리
+        print(f"Job {job_id} error:", e)
 
 def main_loop():
     print("Caia Mail Bridge worker started.")
+    start_outbound_workers()
     while True:
         try:
-            jobs = fetch_unseen_jobs()
-            for job in jobs:
-                subj = job["subject"]
-                sender = job["from"]
-                job_id = extract_job_id(subj)
-
-                if SUBJECT_PREFIX not in subj:
-                    continue
-
-                if not job["json"]:
-                    ack_to_sender(sender, job_id, False, "본문에서 유효한 Job JSON을 찾지 못했습니다.")
-                    continue
-
-                # 젠스파크로 전달
-                forward_to_zenspark(sender, subj, job["json"])
-                # 접수 확인 회신
-                ack_to_sender(sender, job_id, True, "작업을 접수하여 젠스파크로 전달했습니다.")
-                print(f"Forwarded job {job_id} from {sender}")
+            # 잡 처리는 파싱 + 발송 큐 적재뿐이라 그대로 순차 처리 (SMTP 왕복은 발송 워커 몫)
+            for job in fetch_unseen_jobs():
+                process_job(job)
 
         except Exception as e:
             print("Loop error:", e)
 
-        time.sleep(POLL_INTERVAL)
+        # 새 메일 push(EXISTS)가 오면 바로 다음 검색
+        wait_for_mail()
 
 if __name__ == "__main__":
     required = [IMAP_USER, IMAP_PASSWORD, SMTP_USER, SMTP_PASSWORD]
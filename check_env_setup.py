@@ -7,9 +7,58 @@ Railway 환경변수 설정 확인 스크립트
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Tuple
 from datetime import datetime
 
+# orjson이 있으면 응답 디코딩에 사용 (없으면 표준 json)
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# 개별 조회 결과 대기 한도 (requests timeout=5 + 여유)
+PROBE_TIMEOUT = 6
+
+# 환경변수 스냅샷 (CLI 실행당 한 번, 점검 중 반복 조회를 dict 조회로)
+ENV: Dict[str, str] = dict(os.environ)
+
+# keep-alive 세션 (같은 Railway 호스트로의 조회가 연결을 재사용)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# 필수 환경변수
+REQUIRED_VARS = (
+    ("AUTH_TOKEN", "API 인증 토큰 (GPT Tool 호출 시 필요)"),
+    ("INBOUND_TOKEN", "인바운드 메일 수신 인증 토큰"),
+    ("SENDGRID_API_KEY", "SendGrid API 키 (메일 발송)"),
+    ("OPENAI_API_KEY", "OpenAI API 키 (Assistant 연동)"),
+    ("ASSISTANT_ID", "OpenAI Assistant ID"),
+    ("THREAD_ID", "OpenAI Thread ID"),
+    ("SENDER_DEFAULT", "기본 발신자 이메일 주소"),
+)
+
+# 선택 환경변수
+OPTIONAL_VARS = (
+    ("AUTO_RUN", "자동 Assistant 실행 (true/false)"),
+    ("TELEGRAM_BOT_TOKEN", "Telegram 봇 토큰 (알림용)"),
+    ("TELEGRAM_CHAT_ID", "Telegram 채팅 ID (알림용)"),
+    ("ALERT_CLASSES", "알림 클래스 (SENTINEL,REFLEX,ZENSPARK)"),
+    ("ALERT_IMPORTANCE_MIN", "최소 중요도 임계값 (0.0-1.0)"),
+    ("DB_PATH", "데이터베이스 경로"),
+)
+
+# 설정 가이드에서 안내하는 필수 항목
+GUIDE_REQUIRED = (
+    "AUTH_TOKEN", "INBOUND_TOKEN", "SENDGRID_API_KEY",
+    "OPENAI_API_KEY", "ASSISTANT_ID", "THREAD_ID",
+)
+
+# 값 일부만 표시할 민감 변수 이름 토큰
+_SENSITIVE = ("KEY", "TOKEN", "SECRET", "PASS")
+
 # 색상 코드 (터미널 출력용)
 class Colors:
     GREEN = '\033[92m'
@@ -21,12 +70,12 @@ class Colors:
 
 def check_env_var(name: str, required: bool = True, description: str = "") -> Tuple[bool, str]:
     """환경변수 체크"""
-    value = os.getenv(name, "")
+    value = ENV.get(name, "")
     exists = bool(value)
     
     if exists:
         # 민감한 정보는 일부만 표시
-        if "KEY" in name or "TOKEN" in name:
+        if any(tok in name for tok in _SENSITIVE):
             display_value = f"{value[:8]}..." if len(value) > 8 else "***"
         else:
             display_value = value
@@ -40,32 +89,11 @@ def check_railway_env():
     print(f"{Colors.BOLD}📋 Railway 환경변수 설정 확인{Colors.END}")
     print(f"{Colors.BOLD}{'='*60}{Colors.END}\n")
     
-    # 필수 환경변수
-    required_vars = [
-        ("AUTH_TOKEN", "API 인증 토큰 (GPT Tool 호출 시 필요)"),
-        ("INBOUND_TOKEN", "인바운드 메일 수신 인증 토큰"),
-        ("SENDGRID_API_KEY", "SendGrid API 키 (메일 발송)"),
-        ("OPENAI_API_KEY", "OpenAI API 키 (Assistant 연동)"),
-        ("ASSISTANT_ID", "OpenAI Assistant ID"),
-        ("THREAD_ID", "OpenAI Thread ID"),
-        ("SENDER_DEFAULT", "기본 발신자 이메일 주소"),
-    ]
-    
-    # 선택 환경변수
-    optional_vars = [
-        ("AUTO_RUN", "자동 Assistant 실행 (true/false)"),
-        ("TELEGRAM_BOT_TOKEN", "Telegram 봇 토큰 (알림용)"),
-        ("TELEGRAM_CHAT_ID", "Telegram 채팅 ID (알림용)"),
-        ("ALERT_CLASSES", "알림 클래스 (SENTINEL,REFLEX,ZENSPARK)"),
-        ("ALERT_IMPORTANCE_MIN", "최소 중요도 임계값 (0.0-1.0)"),
-        ("DB_PATH", "데이터베이스 경로"),
-    ]
-    
     print(f"{Colors.BOLD}1. 필수 환경변수:{Colors.END}")
     print("-" * 40)
     
     required_ok = True
-    for var_name, description in required_vars:
+    for var_name, description in REQUIRED_VARS:
         exists, value = check_env_var(var_name)
         if exists:
             print(f"  ✅ {Colors.GREEN}{var_name}{Colors.END}: {value}")
@@ -76,7 +104,7 @@ def check_railway_env():
     print(f"\n{Colors.BOLD}2. 선택 환경변수:{Colors.END}")
     print("-" * 40)
     
-    for var_name, description in optional_vars:
+    for var_name, description in OPTIONAL_VARS:
         exists, value = check_env_var(var_name)
         if exists:
             print(f"  ✅ {Colors.GREEN}{var_name}{Colors.END}: {value}")
@@ -85,21 +113,29 @@ def check_railway_env():
     
     return required_ok
 
-def test_api_connection():
+def start_api_probes(ex: ThreadPoolExecutor) -> Dict[str, Future]:
+    """API 호출을 병렬로 시작 (결과 출력은 test_api_connection)"""
+    base_url = "https://worker-production-4369.up.railway.app"
+    auth_token = ENV.get("AUTH_TOKEN", "")
+    
+    probes = {"health": ex.submit(SESSION.get, f"{base_url}/health", timeout=5)}
+    if auth_token:
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        probes["status"] = ex.submit(SESSION.get, f"{base_url}/status", headers=headers, timeout=5)
+    return probes
+
+def test_api_connection(probes: Dict[str, Future]):
     """API 연결 테스트"""
     print(f"\n{Colors.BOLD}{'='*60}{Colors.END}")
     print(f"{Colors.BOLD}🔌 API 연결 테스트{Colors.END}")
     print(f"{Colors.BOLD}{'='*60}{Colors.END}\n")
     
-    base_url = "https://worker-production-4369.up.railway.app"
-    auth_token = os.getenv("AUTH_TOKEN", "")
-    
     # 1. Health Check (인증 불필요)
     print("1. Health Check 테스트...")
     try:
-        resp = requests.get(f"{base_url}/health", timeout=5)
+        resp = probes["health"].result(timeout=PROBE_TIMEOUT)
         if resp.status_code == 200:
-            data = resp.json()
+            data = _loads(resp.content)
             print(f"  ✅ {Colors.GREEN}서비스 정상{Colors.END}")
             print(f"     - 버전: {data.get('version', 'unknown')}")
             print(f"     - 발신자: {data.get('sender', 'unknown')}")
@@ -109,13 +145,12 @@ def test_api_connection():
         print(f"  ❌ {Colors.RED}연결 실패{Colors.END}: {str(e)}")
     
     # 2. Status Check (인증 필요)
-    if auth_token:
+    if "status" in probes:
         print("\n2. Status Check 테스트 (인증 필요)...")
         try:
-            headers = {"Authorization": f"Bearer {auth_token}"}
-            resp = requests.get(f"{base_url}/status", headers=headers, timeout=5)
+            resp = probes["status"].result(timeout=PROBE_TIMEOUT)
             if resp.status_code == 200:
-                data = resp.json()
+                data = _loads(resp.content)
                 print(f"  ✅ {Colors.GREEN}인증 성공{Colors.END}")
                 print(f"     - 메시지 수: {data.get('messages', 0)}")
                 print(f"     - AUTO_RUN: {data.get('auto_run', False)}")
@@ -129,60 +164,83 @@ def test_api_connection():
     else:
         print(f"  ⚠️  {Colors.YELLOW}AUTH_TOKEN 미설정{Colors.END}: 테스트 건너뜀")
 
-def test_openai_connection():
+def _probe_thread(client, thread_id: str):
+    """Thread 조회 + 최근 메시지 1건"""
+    thread = client.beta.threads.retrieve(thread_id)
+    messages = client.beta.threads.messages.list(thread_id, limit=1)
+    return thread, messages
+
+def start_openai_probes(ex: ThreadPoolExecutor) -> Dict[str, object]:
+    """OpenAI 조회를 병렬로 시작 (결과 출력은 test_openai_connection)"""
+    api_key = ENV.get("OPENAI_API_KEY", "")
+    assistant_id = ENV.get("ASSISTANT_ID", "")
+    thread_id = ENV.get("THREAD_ID", "")
+    
+    if not api_key:
+        return {}
+    
+    try:
+        from openai import OpenAI
+        # 결과 대기(PROBE_TIMEOUT)와 맞춰 요청 자체도 끊음 (기본 600초 + 재시도면 스크립트가 종료되지 않음)
+        client = OpenAI(api_key=api_key, timeout=PROBE_TIMEOUT, max_retries=0)
+    except Exception as e:
+        return {"error": e}
+    
+    probes: Dict[str, object] = {}
+    if assistant_id:
+        probes["assistant"] = ex.submit(client.beta.assistants.retrieve, assistant_id)
+    if thread_id:
+        probes["thread"] = ex.submit(_probe_thread, client, thread_id)
+    return probes
+
+def test_openai_connection(probes: Dict[str, object]):
     """OpenAI API 연결 테스트"""
     print(f"\n{Colors.BOLD}{'='*60}{Colors.END}")
     print(f"{Colors.BOLD}🤖 OpenAI API 연결 테스트{Colors.END}")
     print(f"{Colors.BOLD}{'='*60}{Colors.END}\n")
     
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    assistant_id = os.getenv("ASSISTANT_ID", "")
-    thread_id = os.getenv("THREAD_ID", "")
+    api_key = ENV.get("OPENAI_API_KEY", "")
     
     if not api_key:
         print(f"  ⚠️  {Colors.YELLOW}OPENAI_API_KEY 미설정{Colors.END}: 테스트 건너뜀")
         return False
     
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-        
-        # Assistant 확인
-        if assistant_id:
-            print("1. Assistant 확인...")
-            try:
-                assistant = client.beta.assistants.retrieve(assistant_id)
-                print(f"  ✅ {Colors.GREEN}Assistant 연결 성공{Colors.END}")
-                print(f"     - 이름: {assistant.name}")
-                print(f"     - 모델: {assistant.model}")
-                tools_count = len(assistant.tools) if assistant.tools else 0
-                print(f"     - 도구 수: {tools_count}")
-            except Exception as e:
-                print(f"  ❌ {Colors.RED}Assistant 확인 실패{Colors.END}: {str(e)}")
-        
-        # Thread 확인
-        if thread_id:
-            print("\n2. Thread 확인...")
-            try:
-                thread = client.beta.threads.retrieve(thread_id)
-                print(f"  ✅ {Colors.GREEN}Thread 연결 성공{Colors.END}")
-                print(f"     - Thread ID: {thread.id}")
-                
-                # 최근 메시지 확인
-                messages = client.beta.threads.messages.list(thread_id, limit=1)
-                if messages.data:
-                    print(f"     - 최근 메시지: {len(messages.data)}개")
-            except Exception as e:
-                print(f"  ❌ {Colors.RED}Thread 확인 실패{Colors.END}: {str(e)}")
-                
-        return True
-        
-    except ImportError:
+    error = probes.get("error")
+    if isinstance(error, ImportError):
         print(f"  ⚠️  {Colors.YELLOW}OpenAI 라이브러리 미설치{Colors.END}")
         return False
-    except Exception as e:
-        print(f"  ❌ {Colors.RED}OpenAI 연결 실패{Colors.END}: {str(e)}")
+    if error:
+        print(f"  ❌ {Colors.RED}OpenAI 연결 실패{Colors.END}: {str(error)}")
         return False
+    
+    # Assistant 확인
+    if "assistant" in probes:
+        print("1. Assistant 확인...")
+        try:
+            assistant = probes["assistant"].result(timeout=PROBE_TIMEOUT)
+            print(f"  ✅ {Colors.GREEN}Assistant 연결 성공{Colors.END}")
+            print(f"     - 이름: {assistant.name}")
+            print(f"     - 모델: {assistant.model}")
+            tools_count = len(assistant.tools) if assistant.tools else 0
+            print(f"     - 도구 수: {tools_count}")
+        except Exception as e:
+            print(f"  ❌ {Colors.RED}Assistant 확인 실패{Colors.END}: {str(e)}")
+    
+    # Thread 확인
+    if "thread" in probes:
+        print("\n2. Thread 확인...")
+        try:
+            thread, messages = probes["thread"].result(timeout=PROBE_TIMEOUT)
+            print(f"  ✅ {Colors.GREEN}Thread 연결 성공{Colors.END}")
+            print(f"     - Thread ID: {thread.id}")
+            
+            # 최근 메시지 확인
+            if messages.data:
+                print(f"     - 최근 메시지: {len(messages.data)}개")
+        except Exception as e:
+            print(f"  ❌ {Colors.RED}Thread 확인 실패{Colors.END}: {str(e)}")
+            
+    return True
 
 def generate_setup_guide():
     """설정 가이드 생성"""
@@ -193,13 +251,8 @@ def generate_setup_guide():
     missing_vars = []
     
     # 필수 환경변수 체크
-    required = [
-        "AUTH_TOKEN", "INBOUND_TOKEN", "SENDGRID_API_KEY",
-        "OPENAI_API_KEY", "ASSISTANT_ID", "THREAD_ID"
-    ]
-    
-    for var in required:
-        if not os.getenv(var):
+    for var in GUIDE_REQUIRED:
+        if not ENV.get(var):
             missing_vars.append(var)
     
     if missing_vars:
@@ -225,12 +278,12 @@ def generate_setup_guide():
     
     # SendGrid Webhook 설정
     print(f"\n{Colors.BOLD}SendGrid Inbound Parse 설정:{Colors.END}")
-    inbound_token = os.getenv("INBOUND_TOKEN", "YOUR_INBOUND_TOKEN")
+    inbound_token = ENV.get("INBOUND_TOKEN", "YOUR_INBOUND_TOKEN")
     print(f"  Webhook URL: {Colors.BLUE}https://worker-production-4369.up.railway.app/inbound/sen?token={inbound_token}{Colors.END}")
     
     # GPT Assistant Tool 설정
     print(f"\n{Colors.BOLD}GPT Assistant Tools 설정:{Colors.END}")
-    auth_token = os.getenv("AUTH_TOKEN", "YOUR_AUTH_TOKEN")
+    auth_token = ENV.get("AUTH_TOKEN", "YOUR_AUTH_TOKEN")
     print(f"  Base URL: {Colors.BLUE}https://worker-production-4369.up.railway.app{Colors.END}")
     print(f"  Auth Header: {Colors.BLUE}Authorization: Bearer {auth_token[:8] if auth_token else 'YOUR_AUTH_TOKEN'}...{Colors.END}")
 
@@ -239,14 +292,23 @@ def main():
     print(f"\n{Colors.BOLD}{Colors.BLUE}🚀 메일브릿지 설정 종합 점검{Colors.END}")
     print(f"{Colors.BLUE}실행 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{Colors.END}")
     
-    # 1. 환경변수 체크
-    env_ok = check_railway_env()
-    
-    # 2. API 연결 테스트
-    test_api_connection()
-    
-    # 3. OpenAI 연결 테스트
-    test_openai_connection()
+    # 네트워크 조회는 전부 먼저 병렬로 시작하고, 결과는 섹션 순서대로 출력
+    ex = ThreadPoolExecutor(max_workers=8)
+    try:
+        api_probes = start_api_probes(ex)
+        openai_probes = start_openai_probes(ex)
+        
+        # 1. 환경변수 체크
+        env_ok = check_railway_env()
+        
+        # 2. API 연결 테스트
+        test_api_connection(api_probes)
+        
+        # 3. OpenAI 연결 테스트
+        test_openai_connection(openai_probes)
+    finally:
+        # 타임아웃으로 보고된 조회를 기다리지 않음 (with 블록의 shutdown(wait=True) 대신)
+        ex.shutdown(wait=False, cancel_futures=True)
     
     # 4. 설정 가이드
     generate_setup_guide()
@@ -1,15 +1,57 @@
 # mailer_sg.py (final)
-import asyncio, os, time, base64
-from typing import List, Optional, Dict
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import (
-    Mail, Email, To, Cc, Bcc, Attachment,
-    FileContent, FileName, FileType, Disposition,
-    ReplyTo, Category, MailSettings, SandBoxMode,
-    TrackingSettings, ClickTracking, OpenTracking
-)
+import asyncio, os, time, binascii
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any
+import httpx
+
+# pybase64(SIMD)가 있으면 첨부 인코딩에 사용 (없으면 표준 binascii)
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    def _b64encode(data: bytes) -> bytes:
+        return binascii.b2a_base64(data, newline=False)
+
+# orjson이 있으면 요청 본문 직렬화에 사용 (없으면 표준 json)
+try:
+    import orjson
+    _dumpb = orjson.dumps
+except ImportError:
+    import json
+
+    def _dumpb(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+# h2가 설치돼 있으면 HTTP/2로 동시 발송을 한 연결에 다중화
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 SG_API_KEY = os.getenv("SENDGRID_API_KEY")
+SG_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+
+# 발송 전용 스레드풀 (기본 executor를 쓰는 다른 작업 뒤에 줄서지 않도록)
+_SEND_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sendgrid")
+
+# SendGrid API 연결 재사용 (호출마다 새 커넥션 풀/TLS 핸드셰이크 방지), 발송 스레드 수만큼 유지
+_SG_CLIENT = httpx.Client(
+    http2=_HTTP2,
+    timeout=20.0,
+    headers={"Content-Type": "application/json"},
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+
+def _unique_addrs(addrs: Optional[List[str]], seen: set) -> List[str]:
+    """공백 제거 + 대소문자 무시 중복 제거 (seen은 to/cc/bcc가 공유)"""
+    out = []
+    for x in addrs or ():
+        x = (x or "").strip()
+        key = x.lower()
+        if x and key not in seen:
+            seen.add(key)
+            out.append(x)
+    return out
 
 async def send_email_sg(
     mail_from: str,
@@ -33,98 +75,102 @@ async def send_email_sg(
     if not SG_API_KEY:
         raise RuntimeError("SENDGRID_API_KEY not set")
 
-    # 수신자 정리
-    to  = [x.strip() for x in (to or []) if x and x.strip()]
-    cc  = [x.strip() for x in (cc or []) if x and x.strip()] if cc else None
-    bcc = [x.strip() for x in (bcc or []) if x and x.strip()] if bcc else None
+    # 수신자 정리 (to → cc → bcc 순서로 한 번에 중복 제거; SendGrid는 중복 주소 요청을 400으로 거부)
+    seen = set()
+    to  = _unique_addrs(to, seen)
+    cc  = _unique_addrs(cc, seen) or None
+    bcc = _unique_addrs(bcc, seen) or None
     if not to:
         raise ValueError("to recipients required")
 
     subject = (subject or "").strip() or "(제목 없음)"
     text    = (text or "").strip() or "(내용 없음)"
 
-    msg = Mail(
-        from_email=Email(mail_from),
-        to_emails=[To(x) for x in to],
-        subject=subject,
-        plain_text_content=text,
-        html_content=html if html else None,
-    )
+    # v3 mail/send JSON 직접 구성 (SDK 헬퍼 객체 생성 생략)
+    personalization: Dict[str, Any] = {"to": [{"email": x} for x in to]}
     if cc:
-        msg.cc = [Cc(x) for x in cc]
+        personalization["cc"] = [{"email": x} for x in cc]
     if bcc:
-        msg.bcc = [Bcc(x) for x in bcc]
+        personalization["bcc"] = [{"email": x} for x in bcc]
+
+    # text/plain이 text/html보다 먼저 와야 함
+    content = [{"type": "text/plain", "value": text}]
+    if html:
+        content.append({"type": "text/html", "value": html})
+
+    payload: Dict[str, Any] = {
+        "personalizations": [personalization],
+        "from": {"email": mail_from},
+        "subject": subject,
+        "content": content,
+    }
     if reply_to:
-        msg.reply_to = ReplyTo(reply_to)
+        payload["reply_to"] = {"email": reply_to}
 
     # 헤더
     if headers:
-        # helpers.Header 대신 dict로 직접 지정이 호환성 높음
-        msg.headers = {str(k): str(v) for k, v in headers.items()}
+        payload["headers"] = {str(k): str(v) for k, v in headers.items()}
 
     # 카테고리
     if categories:
-        # add_category()가 없는 버전 대비
-        try:
-            for c in categories:
-                msg.add_category(Category(str(c)))
-        except Exception:
-            msg.category = [Category(str(c)) for c in categories]
+        payload["categories"] = [str(c) for c in categories]
 
     # 샌드박스/트래킹
-    if sandbox or track_opens or track_clicks:
-        ms = MailSettings()
-        if sandbox:
-            ms.sandbox_mode = SandBoxMode(enable=True)
-        msg.mail_settings = ms
-
-        ts = TrackingSettings()
+    if sandbox:
+        payload["mail_settings"] = {"sandbox_mode": {"enable": True}}
+    if track_opens or track_clicks:
+        ts = {}
         if track_clicks:
-            ts.click_tracking = ClickTracking(enable=True, enable_text=True)
+            ts["click_tracking"] = {"enable": True, "enable_text": True}
         if track_opens:
-            ts.open_tracking = OpenTracking(enable=True)
-        msg.tracking_settings = ts
+            ts["open_tracking"] = {"enable": True}
+        payload["tracking_settings"] = ts
 
-    # 첨부 (content_b64 필수)
-    if attachments_b64:
-        for att in attachments_b64:
-            content_b64 = att.get("content_b64") or att.get("content")  # 호환 키
-            if not content_b64:
-                continue
-            # 이미 b64라면 그대로, raw bytes가 온 경우 b64로 인코딩
-            if isinstance(content_b64, (bytes, bytearray)):
-                content_b64 = base64.b64encode(content_b64).decode()
-            msg.add_attachment(
-                Attachment(
-                    FileContent(content_b64),
-                    FileName(att.get("filename", "attachment.bin")),
-                    FileType(att.get("content_type", "application/octet-stream")),
-                    Disposition("attachment"),
-                )
-            )
+    loop = asyncio.get_running_loop()
+    # 첨부 base64 인코딩은 수 MB가 될 수 있으므로 executor 스레드에서 처리
+    return await loop.run_in_executor(_SEND_POOL, _send_blocking, payload, retries, backoff, attachments_b64)
 
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _send_blocking, msg, retries, backoff)
 
-
-def _send_blocking(msg: Mail, retries: int, backoff: float):
-    sg = SendGridAPIClient(SG_API_KEY)
+def _add_attachments(payload: Dict[str, Any], attachments_b64: List[dict]):
+    # 첨부 (content_b64 필수)
+    out = []
+    for att in attachments_b64:
+        content_b64 = att.get("content_b64") or att.get("content")  # 호환 키
+        if not content_b64:
+            continue
+        # 이미 b64라면 그대로, raw bytes가 온 경우 b64로 인코딩
+        if isinstance(content_b64, (bytes, bytearray)):
+            content_b64 = _b64encode(content_b64).decode("ascii")
+        out.append({
+            "content": content_b64,
+            "filename": att.get("filename", "attachment.bin"),
+            "type": att.get("content_type", "application/octet-stream"),
+            "disposition": "attachment",
+        })
+    if out:
+        payload["attachments"] = out
+
+
+def _send_blocking(payload: Dict[str, Any], retries: int, backoff: float, attachments_b64: Optional[List[dict]] = None):
+    if attachments_b64:
+        _add_attachments(payload, attachments_b64)
+    auth = {"Authorization": f"Bearer {SG_API_KEY}"}
+    body = _dumpb(payload)  # 재시도 때 다시 직렬화하지 않도록 한 번만
 
     attempt = 0
     last_exc = None
     while attempt <= retries:
         try:
-            resp = sg.send(msg)
-            status = int(resp.status_code)
-            headers = dict(resp.headers) if resp.headers else {}
-            msg_id = headers.get("X-Message-Id") or headers.get("X-Message-ID") or headers.get("x-message-id")
+            resp = _SG_CLIENT.post(SG_SEND_URL, content=body, headers=auth)
+            status = resp.status_code
+            headers = dict(resp.headers)
+            msg_id = resp.headers.get("X-Message-Id")
 
             # 디버그 로그(필요시 주석)
             try:
                 print("[SendGrid] status:", status)
-                body = resp.body.decode() if hasattr(resp.body, "decode") else resp.body
-                if body:
-                    print("[SendGrid] body:", body)
+                if resp.content:
+                    print("[SendGrid] body:", resp.text)
                 print("[SendGrid] headers:", headers)
             except Exception:
                 pass
@@ -1,20 +1,32 @@
 # server/routes/mail_manage.py
 from fastapi import APIRouter
 from pydantic import BaseModel
-import sqlite3
+import sqlite3, threading
 
 router = APIRouter()
 
 class DeleteRequest(BaseModel):
     id: int
 
+class BatchDeleteRequest(BaseModel):
+    ids: list[int]
+
 class AutoReplyRequest(BaseModel):
     id: int
     reply_text: str | None = "자동 회신: 메일을 확인했습니다."
 
+# 요청마다 open/close 하지 않고 스레드(FastAPI 스레드풀)별 연결 재사용
+_TLS = threading.local()
+
 def get_db():
-    conn = sqlite3.connect("mailbridge.sqlite3")
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_TLS, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect("mailbridge.sqlite3")
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _TLS.conn = conn
     return conn
 
 @router.post("/mail/delete")
@@ -25,6 +37,15 @@ def mail_delete(req: DeleteRequest):
     conn.commit()
     return {"ok": True, "deleted_id": req.id}
 
+@router.post("/mail/delete/batch")
+def mail_delete_batch(req: BatchDeleteRequest):
+    # 여러 건을 한 트랜잭션(커밋 1회)으로 처리
+    conn = get_db()
+    cur = conn.cursor()
+    cur.executemany("UPDATE mails SET deleted=1 WHERE id=?", [(i,) for i in req.ids])
+    conn.commit()
+    return {"ok": True, "deleted_ids": req.ids, "count": cur.rowcount}
+
 @router.post("/mail/auto-reply")
 def auto_reply(req: AutoReplyRequest):
     conn = get_db()
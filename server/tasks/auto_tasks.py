@@ -1,40 +1,80 @@
 # server/tasks/auto_tasks.py
-import sqlite3, os, requests
-from datetime import datetime, timedelta
+import sqlite3, os, threading
+from datetime import datetime, timedelta, timezone
+
+from server.utils.telegram_notify import HTTP_SESSION, NOTIFY_POOL
 
 MAIL_BASE = os.getenv("MAIL_BASE", "https://worker-production-4369.up.railway.app")
 AUTH_TOKEN = os.getenv("AUTH_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+SEND_URL = f"{MAIL_BASE}/tool/send?token={AUTH_TOKEN}"
+REPORT_BATCH = 20  # report_high_priority 알림 1건당 최대 메일 수
+
+# 스레드별로 연결 하나를 계속 재사용 (페이지 캐시 유지, 매 작업 open/PRAGMA 생략)
+_TLS = threading.local()
+# created_at_ts 컬럼 준비는 프로세스당 한 번만 (auto_delete에서만 사용)
+_SCHEMA_LOCK = threading.Lock()
+_schema_ready = False
 
 def get_db():
-    conn = sqlite3.connect("mailbridge.sqlite3")
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_TLS, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect("mailbridge.sqlite3")
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _TLS.conn = conn
     return conn
 
+def _ensure_created_at_ts(conn):
+    """
+    created_at(ISO 텍스트)에서 계산되는 정수 epoch 생성 컬럼을 두고 auto_delete 범위 조건을 정수 비교로.
+    VIRTUAL 생성 컬럼이라 백필/INSERT 경로 변경/트리거가 필요 없음. mails 테이블이 아직 없으면 건너뜀.
+    """
+    global _schema_ready
+    with _SCHEMA_LOCK:
+        if _schema_ready:
+            return
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='mails'").fetchone() is None:
+            return
+        cols = {r["name"] for r in conn.execute("PRAGMA table_xinfo(mails)")}
+        if "created_at_ts" not in cols:
+            conn.execute("""
+                ALTER TABLE mails ADD COLUMN created_at_ts INTEGER
+                GENERATED ALWAYS AS (CAST(strftime('%s', created_at) AS INTEGER)) VIRTUAL
+            """)
+        # auto_delete 조건(deleted, priority, created_at_ts)을 인덱스로 커버
+        conn.execute("DROP INDEX IF EXISTS idx_mails_gc")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_mails_gc_ts ON mails(deleted, priority, created_at_ts)")
+        conn.commit()
+        _schema_ready = True
+
+def _post_notify(payload: dict):
+    try:
+        HTTP_SESSION.post(SEND_URL, json=payload, timeout=10)
+    except Exception as e:
+        print("Telegram notify failed", e)
+
 def notify_telegram(subject: str, text: str):
+    """알림은 fire-and-forget: 전송은 NOTIFY_POOL에서 처리하고 바로 반환"""
     if not (AUTH_TOKEN and TELEGRAM_CHAT_ID):
         return
-    url = f"{MAIL_BASE}/tool/send?token={AUTH_TOKEN}"
     payload = {
         "to": ["telegram"],
         "subject": subject,
         "text": f"[CaiaMailBridge]\n{text}"
     }
-    try:
-        requests.post(url, json=payload, timeout=10)
-    except Exception as e:
-        print("Telegram notify failed", e)
+    NOTIFY_POOL.submit(_post_notify, payload)
 
 def auto_delete(ttl_days: int = 7):
     conn = get_db()
+    if not _schema_ready:
+        _ensure_created_at_ts(conn)
     cur = conn.cursor()
-    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
-    cur.execute("SELECT id, subject FROM mails WHERE deleted=0 AND priority='low' AND created_at < ?", (cutoff.isoformat(),))
-    rows = cur.fetchall()
-    deleted_count = 0
-    for row in rows:
-        cur.execute("UPDATE mails SET deleted=1 WHERE id=?", (row["id"],))
-        deleted_count += 1
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+    # 행별 UPDATE 대신 한 문장으로 처리, 건수는 rowcount로
+    cur.execute("UPDATE mails SET deleted=1 WHERE deleted=0 AND priority='low' AND created_at_ts < ?", (int(cutoff.timestamp()),))
+    deleted_count = cur.rowcount
     conn.commit()
     # Only notify if bulk deletion
     if deleted_count >= 50:
@@ -45,12 +85,17 @@ def auto_reply():
     cur = conn.cursor()
     cur.execute("SELECT id, from_, subject FROM mails WHERE replied=0 AND auto_reply=1")
     rows = cur.fetchall()
-    for row in rows:
-        try:
-            # simulate reply send
-            cur.execute("UPDATE mails SET replied=1 WHERE id=?", (row["id"],))
-        except Exception as e:
-            notify_telegram("자동답장 실패", f"메일 ID {row['id']} ({row['subject']}) 답장 실패: {e}")
+    # simulate reply send → 한 번에 executemany로 표시
+    try:
+        cur.executemany("UPDATE mails SET replied=1 WHERE id=?", [(row["id"],) for row in rows])
+    except Exception:
+        # 배치 실패 시 행별로 재시도해 실패한 메일만 알림
+        conn.rollback()
+        for row in rows:
+            try:
+                cur.execute("UPDATE mails SET replied=1 WHERE id=?", (row["id"],))
+            except Exception as e:
+                notify_telegram("자동답장 실패", f"메일 ID {row['id']} ({row['subject']}) 답장 실패: {e}")
     conn.commit()
 
 def report_high_priority():
@@ -58,5 +103,9 @@ def report_high_priority():
     cur = conn.cursor()
     cur.execute("SELECT id, from_, subject FROM mails WHERE priority='high' AND deleted=0")
     rows = cur.fetchall()
-    for row in rows:
-        notify_telegram("중요 메일 도착", f"{row['subject']} from {row['from_']} (ID {row['id']})")
+    # 행마다 요청하지 않고 REPORT_BATCH건씩 묶어 한 번에 알림
+    lines = [f"{row['subject']} from {row['from_']} (ID {row['id']})" for row in rows]
+    for i in range(0, len(lines), REPORT_BATCH):
+        chunk = lines[i:i + REPORT_BATCH]
+        subject = "중요 메일 도착" if len(chunk) == 1 else f"중요 메일 도착 ({len(chunk)}건)"
+        notify_telegram(subject, "\n".join(chunk))
@@ -1,17 +1,30 @@
 # server/utils/telegram_notify.py
 import os, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 MAIL_BASE = os.getenv("MAIL_BASE", "https://worker-production-4369.up.railway.app")
 AUTH_TOKEN = os.getenv("AUTH_TOKEN")
 
+# 알림마다 새 TCP/TLS 연결을 맺지 않도록 프로세스 공용 세션(keep-alive 풀) 사용
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8, pool_maxsize=32,
+    max_retries=Retry(total=1, backoff_factor=0.1),
+))
+SEND_URL = f"{MAIL_BASE}/tool/send?token={AUTH_TOKEN}"
+
+# 결과를 기다릴 필요 없는 알림은 이 풀에서 전송(호출 스레드를 막지 않음)
+NOTIFY_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notify")
+
 def send_telegram_message(text: str, subject: str="Caia Agent 알림"):
-    url = f"{MAIL_BASE}/tool/send?token={AUTH_TOKEN}"
     payload = {
         "to": ["telegram"],
         "subject": subject,
         "text": text
     }
-    r = requests.post(url, json=payload, timeout=10)
+    r = HTTP_SESSION.post(SEND_URL, json=payload, timeout=10)
     try:
         r.raise_for_status()
     except Exception as e:
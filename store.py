@@ -1,9 +1,22 @@
 # store.py
-import sqlite3, os, time, json, hashlib
+import sqlite3, os, time, hashlib, zlib, threading
+import orjson
+from collections import deque
+from itertools import islice
 from typing import List, Dict, Optional
 
 DB_PATH = os.getenv("DB_PATH", "mailbridge.sqlite3")
 
+# 최신 목록 스냅샷: since_id 없는 최신 N개 조회(가장 잦은 읽기)를 메모리에서 처리
+# - 조회마다 MAX(id)(rowid B-tree 끝 한 번 탐색)와 스냅샷 맨 앞 id를 비교, 다르면 DB에서 다시 채움
+#   (다른 프로세스/스레드의 저장이 끼어들어도 빠짐없이 반영)
+# - 이 프로세스의 저장분은 스냅샷 맨 앞과 id가 이어질 때만 앞쪽에 추가
+# - 신 스키마 전용(구스키마는 항상 DB 조회)
+_RECENT_MAX = 200
+_RECENT: deque = deque(maxlen=_RECENT_MAX)
+_RECENT_LOCK = threading.Lock()
+_recent_ready = False
+
 def _conn():
     """
     - WAL 모드 + NORMAL 동기화로 동시성/성능 향상
@@ -40,11 +53,15 @@ def _ensure_new_schema(c):
                 html TEXT,
                 atts TEXT,
                 ts   INTEGER,
-                hash TEXT
+                hash TEXT,
+                has_atts INTEGER DEFAULT 0
             )
         """)
     # 인덱스(존재하면 무시)
-    c.execute("CREATE INDEX IF NOT EXISTS idx_msg_id  ON msg(id)")
+    # id는 INTEGER PRIMARY KEY(rowid 별칭)라 ORDER BY id DESC LIMIT / id 조회는
+    # 이미 B-tree 탐색으로 처리됨 → 별도 id 인덱스는 쓰기 비용만 늘리므로 만들지 않고,
+    # 이전 버전이 만들어 둔 인덱스는 제거
+    c.execute("DROP INDEX IF EXISTS idx_msg_id")
     c.execute("CREATE INDEX IF NOT EXISTS idx_msg_ts  ON msg(ts)")
     # 디듀프용 유니크 인덱스 (이미 있으면 무시)
     try:
@@ -65,6 +82,34 @@ def _ensure_hash_column(c):
     except Exception:
         pass
 
+def _ensure_has_atts_column(c):
+    """
+    목록 조회 시 atts JSON을 매 행 디코딩하지 않도록 첨부 유무를 컬럼으로 보관.
+    컬럼이 새로 추가된 경우 기존 행을 한 번 백필.
+    """
+    cols = _get_msg_columns(c)
+    if "has_atts" in cols:
+        return
+    try:
+        c.execute("ALTER TABLE msg ADD COLUMN has_atts INTEGER DEFAULT 0")
+        c.execute("UPDATE msg SET has_atts=1 WHERE atts IS NOT NULL AND atts NOT IN ('', '[]')")
+    except Exception:
+        pass
+
+def _ensure_old_schema_index(c):
+    """
+    구스키마(uid 기반)는 uid로 디듀프(INSERT OR IGNORE)·정렬(ORDER BY uid DESC)·
+    단건 조회(WHERE uid=?)를 하므로 uid 인덱스가 없으면 매번 풀스캔이 됨.
+    기존 데이터에 중복 uid가 있으면 유니크 대신 일반 인덱스로 대체.
+    """
+    try:
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_msg_uid ON msg(uid)")
+    except Exception:
+        try:
+            c.execute("CREATE INDEX IF NOT EXISTS idx_msg_uid ON msg(uid)")
+        except Exception:
+            pass
+
 def init_db():
     """
     - 테이블 없으면 신 스키마로 생성
@@ -75,14 +120,18 @@ def init_db():
         if not _table_exists(c, "msg"):
             _ensure_new_schema(c)
             c.commit()
+        elif _is_old_uid_schema(c):
+            # 구스키마(uid 기반): uid 인덱스만 보장
+            _ensure_old_schema_index(c)
+            c.commit()
         else:
             # 기존 테이블이 있으면 인덱스/해시 컬럼만 보장
             try:
                 _ensure_new_schema(c)
                 _ensure_hash_column(c)
+                _ensure_has_atts_column(c)
                 c.commit()
             except Exception:
-                # 구스키마(uid 기반)일 수도 있으므로 조용히 통과
                 pass
         c.execute("""CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT)""")
         c.commit()
@@ -96,6 +145,21 @@ def _make_hash(frm: str, rcpt: str, subj: str, text: str) -> str:
     base = f"{frm}|{rcpt}|{subj}|{text}"
     return hashlib.sha256(base.encode("utf-8", "ignore")).hexdigest()
 
+def _pack_html(html: Optional[str]) -> Optional[bytes]:
+    """HTML 본문은 zlib 압축 BLOB으로 저장(행 크기↓ → 페이지당 행 수↑)"""
+    if not html:
+        return None
+    return zlib.compress(html.encode("utf-8", "ignore"), 6)
+
+def _unpack_html(v) -> Optional[str]:
+    """압축 BLOB/기존 TEXT 행 모두 지원"""
+    if isinstance(v, (bytes, bytearray)):
+        try:
+            return zlib.decompress(v).decode("utf-8", "ignore")
+        except Exception:
+            return None
+    return v
+
 def save_messages(msgs: List[Dict]):
     """
     msgs = [{
@@ -108,38 +172,80 @@ def save_messages(msgs: List[Dict]):
     now = int(time.time())
     with _conn() as c:
         if _is_old_uid_schema(c):
-            # 구(UID 기반) 스키마 저장 경로
+            # 구(UID 기반) 스키마 저장 경로 — 한 트랜잭션에서 executemany
+            rows = []
             for i, m in enumerate(msgs):
                 uid = m.get("uid")
                 if uid is None:
                     # Inbound Parse에는 uid가 없음 → 시간 기반 고유값 생성
                     uid = now * 1000 + i
-                frm = m.get("from", "")
-                subj = m.get("subject", "")
-                dt = m.get("date", "")
-                text = m.get("text", "")
-                html = m.get("html")
-                c.execute(
-                    "INSERT OR IGNORE INTO msg(uid, frm, subj, dt, text, html, ts) VALUES(?,?,?,?,?,?,?)",
-                    (int(uid), frm, subj, dt, text, html, now)
-                )
+                rows.append((
+                    int(uid), m.get("from", ""), m.get("subject", ""),
+                    m.get("date", ""), m.get("text", ""), m.get("html"), now
+                ))
+            c.executemany(
+                "INSERT OR IGNORE INTO msg(uid, frm, subj, dt, text, html, ts) VALUES(?,?,?,?,?,?,?)",
+                rows
+            )
             c.commit()
         else:
             # 신 스키마(id AUTOINCREMENT) + 디듀프
+            added = []
             for m in msgs:
                 frm  = (m.get("from") or "").strip()
                 rcpt = (m.get("to") or "").strip()
                 subj = (m.get("subject") or "").strip()
                 dt   = (m.get("date") or "").strip()
                 text = (m.get("text") or "").strip()
-                html = m.get("html")
-                atts = json.dumps(m.get("attachments") or [])
+                html = _pack_html(m.get("html"))
+                att_list = m.get("attachments") or []
+                atts = orjson.dumps(att_list).decode()
                 hval = _make_hash(frm, rcpt, subj, text)
-                c.execute(
-                    "INSERT OR IGNORE INTO msg(frm, rcpt, subj, dt, text, html, atts, ts, hash) VALUES(?,?,?,?,?,?,?,?,?)",
-                    (frm, rcpt, subj, dt, text, html, atts, now, hval)
+                cur = c.execute(
+                    "INSERT OR IGNORE INTO msg(frm, rcpt, subj, dt, text, html, atts, ts, hash, has_atts) VALUES(?,?,?,?,?,?,?,?,?,?)",
+                    (frm, rcpt, subj, dt, text, html, atts, now, hval, 1 if att_list else 0)
                 )
+                if cur.rowcount == 1:
+                    added.append({
+                        "id": cur.lastrowid, "from": frm, "to": rcpt,
+                        "subject": subj, "date": dt, "text": text,
+                        "has_attachments": bool(att_list)
+                    })
             c.commit()
+            _recent_push(added)
+
+def _recent_push(rows: List[Dict]):
+    """커밋된 신규 행(id 오름차순)을 스냅샷 앞쪽에 추가 — id가 이어지지 않으면 다음 조회 때 다시 채움"""
+    global _recent_ready
+    if not rows:
+        return
+    with _RECENT_LOCK:
+        if not _recent_ready:
+            return
+        for r in rows:
+            if not _RECENT or _RECENT[0]["id"] != r["id"] - 1:
+                _recent_ready = False
+                return
+            _RECENT.appendleft(r)
+
+def _recent_get(limit: int, head_id: Optional[int]) -> Optional[List[Dict]]:
+    """스냅샷이 DB 최신 id(head_id)와 일치하면 최신 limit개 복사본, 아니면 None"""
+    with _RECENT_LOCK:
+        if not _recent_ready:
+            return None
+        if (_RECENT[0]["id"] if _RECENT else None) != head_id:
+            return None
+        # 스냅샷이 꽉 차지 않았다면 테이블 전체를 담고 있는 상태
+        if limit > len(_RECENT) and len(_RECENT) >= _RECENT_MAX:
+            return None
+        return [dict(r) for r in islice(_RECENT, limit)]
+
+def _recent_fill(rows: List[Dict]):
+    global _recent_ready
+    with _RECENT_LOCK:
+        _RECENT.clear()
+        _RECENT.extend(dict(r) for r in rows)
+        _recent_ready = True
 
 def list_messages_since(since_id: Optional[int], limit: int = 20):
     """
@@ -172,30 +278,34 @@ def list_messages_since(since_id: Optional[int], limit: int = 20):
                 for r in rows
             ]
         else:
-            # 신 스키마(id AUTOINCREMENT)
+            # 신 스키마(id AUTOINCREMENT) — 첨부 유무는 has_atts 컬럼으로 (atts JSON 미조회)
             if since_id:
                 cur = c.execute(
-                    "SELECT id, frm, rcpt, subj, dt, text, atts FROM msg WHERE id > ? ORDER BY id DESC LIMIT ?",
+                    "SELECT id, frm, rcpt, subj, dt, text, has_atts FROM msg WHERE id > ? ORDER BY id DESC LIMIT ?",
                     (since_id, limit)
                 )
             else:
+                head_id = c.execute("SELECT MAX(id) FROM msg").fetchone()[0]
+                cached = _recent_get(limit, head_id)
+                if cached is not None:
+                    return cached
+                # 스냅샷 미준비/불일치 → 최대치로 한 번 읽어 채움
                 cur = c.execute(
-                    "SELECT id, frm, rcpt, subj, dt, text, atts FROM msg ORDER BY id DESC LIMIT ?",
-                    (limit,)
+                    "SELECT id, frm, rcpt, subj, dt, text, has_atts FROM msg ORDER BY id DESC LIMIT ?",
+                    (_RECENT_MAX,)
                 )
             rows = cur.fetchall()
-            out = []
-            for r in rows:
-                try:
-                    atts = json.loads(r[6] or "[]")
-                    has_atts = bool(atts)
-                except Exception:
-                    has_atts = False
-                out.append({
+            out = [
+                {
                     "id": r[0], "from": r[1], "to": r[2],
                     "subject": r[3], "date": r[4], "text": r[5],
-                    "has_attachments": has_atts
-                })
+                    "has_attachments": bool(r[6])
+                }
+                for r in rows
+            ]
+            if not since_id:
+                _recent_fill(out)
+                out = out[:limit]
             return out
 
 def get_message_by_id(msg_id: int) -> Optional[Dict]:
@@ -232,13 +342,13 @@ def get_message_by_id(msg_id: int) -> Optional[Dict]:
             if not row:
                 return None
             try:
-                atts = json.loads(row[7] or "[]")
+                atts = orjson.loads(row[7] or "[]")
             except Exception:
                 atts = []
             return {
                 "id": row[0], "from": row[1], "to": row[2],
                 "subject": row[3], "date": row[4],
-                "text": row[5], "html": row[6],
+                "text": row[5], "html": _unpack_html(row[6]),
                 "attachments": atts
             }
 
@@ -8,15 +8,106 @@ GPT Tools 연동 테스트 스크립트
 import os
 import json
 import requests
-import time
-from typing import Dict, List, Optional
+from typing import Dict
 from datetime import datetime
 
+# orjson이 있으면 JSON 인코딩/디코딩에 사용 (없으면 표준 json)
+try:
+    import orjson
+    _loads = orjson.loads
+
+    def _dumps(o) -> str:
+        return orjson.dumps(o, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(o) -> str:
+        return json.dumps(o, indent=2, ensure_ascii=False)
+
 # 환경 변수 로드
 BASE_URL = "https://worker-production-4369.up.railway.app"
 AUTH_TOKEN = os.getenv("AUTH_TOKEN", "")
 INBOUND_TOKEN = os.getenv("INBOUND_TOKEN", "")
 
+# 메일 발신 툴 스키마
+SEND_MAIL_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "send_email",
+        "description": "카이아가 이메일을 발송합니다",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "to": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "수신자 이메일 주소 목록"
+                },
+                "subject": {
+                    "type": "string",
+                    "description": "이메일 제목"
+                },
+                "text": {
+                    "type": "string",
+                    "description": "이메일 본문 (텍스트)"
+                },
+                "html": {
+                    "type": "string",
+                    "description": "이메일 본문 (HTML, 선택사항)",
+                    "nullable": True
+                }
+            },
+            "required": ["to", "subject", "text"]
+        }
+    }
+}
+
+# 인박스 조회 툴 스키마
+CHECK_INBOX_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "check_inbox",
+        "description": "카이아의 이메일 인박스를 확인합니다",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "limit": {
+                    "type": "integer",
+                    "description": "조회할 메일 개수 (기본값: 10)",
+                    "default": 10
+                }
+            }
+        }
+    }
+}
+
+# 메일 상세 조회 툴 스키마
+VIEW_EMAIL_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "view_email",
+        "description": "특정 이메일의 상세 내용을 확인합니다",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "id": {
+                    "type": "integer",
+                    "description": "조회할 이메일 ID"
+                }
+            },
+            "required": ["id"]
+        }
+    }
+}
+
+TOOL_SCHEMAS = (SEND_MAIL_SCHEMA, CHECK_INBOX_SCHEMA, VIEW_EMAIL_SCHEMA)
+
+# 스키마는 상수이므로 출력용 JSON도 import 시 한 번만 직렬화
+_TOOL_SCHEMAS_PRETTY = {
+    schema["function"]["name"]: _dumps(schema)
+    for schema in TOOL_SCHEMAS
+}
+
 class MailBridgeTestor:
     def __init__(self):
         self.base_url = BASE_URL
@@ -25,14 +116,17 @@ class MailBridgeTestor:
         self.headers = {
             "Authorization": f"Bearer {self.auth_token}"
         }
+        # keep-alive 세션 (같은 호스트로 TLS 핸드셰이크 1회, 인증 헤더도 세션에 한 번만 설정)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
         
     def test_health(self) -> Dict:
         """서비스 헬스 체크"""
         print("\n🔍 서비스 헬스 체크...")
         try:
-            resp = requests.get(f"{self.base_url}/health")
+            resp = self.session.get(f"{self.base_url}/health")
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
             print(f"✅ 서비스 정상 작동: {data}")
             return data
         except Exception as e:
@@ -43,12 +137,11 @@ class MailBridgeTestor:
         """서비스 상태 확인 (인증 필요)"""
         print("\n🔍 서비스 상태 확인...")
         try:
-            resp = requests.get(
-                f"{self.base_url}/status",
-                headers=self.headers
+            resp = self.session.get(
+                f"{self.base_url}/status"
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
             print(f"✅ 서비스 상태:")
             print(f"  - 버전: {data.get('version')}")
             print(f"  - 메시지 수: {data.get('messages')}")
@@ -85,12 +178,12 @@ class MailBridgeTestor:
         }
         
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 f"{self.base_url}/inbound/sen?token={self.inbound_token}",
                 data=test_mail
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
             print(f"✅ 인바운드 메일 수신 성공:")
             print(f"  - 메시지 ID: {data.get('id')}")
             print(f"  - Thread Message ID: {data.get('assistant', {}).get('thread_message_id')}")
@@ -117,13 +210,12 @@ class MailBridgeTestor:
         }
         
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 f"{self.base_url}/tool/send",
-                json=tool_payload,
-                headers=self.headers
+                json=tool_payload
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
             print(f"✅ 툴 메일 발신 성공:")
             print(f"  - 메시지: {data.get('message')}")
             print(f"  - Status Code: {data.get('status_code')}")
@@ -139,12 +231,11 @@ class MailBridgeTestor:
         print("\n📥 인박스 조회 테스트...")
         
         try:
-            resp = requests.get(
-                f"{self.base_url}/inbox.json?limit=5",
-                headers=self.headers
+            resp = self.session.get(
+                f"{self.base_url}/inbox.json?limit=5"
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = _loads(resp.content)
             messages = data.get('messages', [])
             print(f"✅ 인박스 조회 성공: {len(messages)}개 메시지")
             for msg in messages[:3]:  # 최근 3개만 표시
@@ -159,84 +250,10 @@ class MailBridgeTestor:
         """GPT Assistant Tool Schema 생성"""
         print("\n🛠️ GPT Assistant Tool Schema 생성...")
         
-        # 메일 발신 툴 스키마
-        send_mail_schema = {
-            "type": "function",
-            "function": {
-                "name": "send_email",
-                "description": "카이아가 이메일을 발송합니다",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "to": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "수신자 이메일 주소 목록"
-                        },
-                        "subject": {
-                            "type": "string",
-                            "description": "이메일 제목"
-                        },
-                        "text": {
-                            "type": "string",
-                            "description": "이메일 본문 (텍스트)"
-                        },
-                        "html": {
-                            "type": "string",
-                            "description": "이메일 본문 (HTML, 선택사항)",
-                            "nullable": True
-                        }
-                    },
-                    "required": ["to", "subject", "text"]
-                }
-            }
-        }
-        
-        # 인박스 조회 툴 스키마
-        check_inbox_schema = {
-            "type": "function",
-            "function": {
-                "name": "check_inbox",
-                "description": "카이아의 이메일 인박스를 확인합니다",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "limit": {
-                            "type": "integer",
-                            "description": "조회할 메일 개수 (기본값: 10)",
-                            "default": 10
-                        }
-                    }
-                }
-            }
-        }
-        
-        # 메일 상세 조회 툴 스키마
-        view_email_schema = {
-            "type": "function",
-            "function": {
-                "name": "view_email",
-                "description": "특정 이메일의 상세 내용을 확인합니다",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "id": {
-                            "type": "integer",
-                            "description": "조회할 이메일 ID"
-                        }
-                    },
-                    "required": ["id"]
-                }
-            }
-        }
-        
         print("\n📋 GPT Assistant에 추가할 Tool Schemas:")
-        print("\n1. send_email:")
-        print(json.dumps(send_mail_schema, indent=2, ensure_ascii=False))
-        print("\n2. check_inbox:")
-        print(json.dumps(check_inbox_schema, indent=2, ensure_ascii=False))
-        print("\n3. view_email:")
-        print(json.dumps(view_email_schema, indent=2, ensure_ascii=False))
+        for i, (name, pretty) in enumerate(_TOOL_SCHEMAS_PRETTY.items(), 1):
+            print(f"\n{i}. {name}:")
+            print(pretty)
         
         # Function Call 처리 예시 코드
         function_handlers = """
@@ -279,7 +296,7 @@ async def handle_function_call(function_name, arguments):
         print(function_handlers)
         
         return {
-            "schemas": [send_mail_schema, check_inbox_schema, view_email_schema],
+            "schemas": list(TOOL_SCHEMAS),
             "handler_example": function_handlers
         }
 